@@ -0,0 +1,116 @@
+import math
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from graph_builder import NetworkGraph
+from ner_store import LABEL_COLORS, DEFAULT_COLOR
+
+# Entities co-occur when they are mentioned in the same document, or within PASSAGE_SIZE
+# characters of each other
+COOCCURRENCE_DOCUMENT = 'Document'
+COOCCURRENCE_PASSAGE = 'Passage'
+PASSAGE_SIZE = 1000
+
+# Pairs seen together fewer times than this, or less often than chance would have
+# them (negative NPMI), are left out
+MIN_COOCCURRENCE = 2
+MIN_NPMI = 0.0
+
+# Only the entities found in the most documents or passages take part; the matrix
+# product grows with the square of the number of entities
+MAX_ENTITIES = 5000
+
+EDGE_COLOR = "gray"
+
+
+def mention_frame(mentions):
+    # mentions holds (doc_hash, label, text, start_char); entity texts broken over lines
+    # or padded with spaces are the same entity
+    frame = pd.DataFrame(list(mentions), columns=['doc_hash', 'label', 'text', 'start_char'])
+    frame['text'] = frame['text'].astype(str).str.split().str.join(' ')
+    return frame[frame['text'] != '']
+
+
+def cooccurrence_graph(mentions, mode=COOCCURRENCE_PASSAGE, passage_size=PASSAGE_SIZE,
+                       min_count=MIN_COOCCURRENCE, min_npmi=MIN_NPMI, max_entities=MAX_ENTITIES):
+    # Weighted co-occurrence network of the entities. Builds a sparse unit x entity matrix
+    # of 0/1 and gets every pair count at once from a matrix product. Edges are weighted
+    # by count and scored by normalized PMI
+    graph = NetworkGraph()
+    frame = mention_frame(mentions)
+    if frame.empty:
+        return graph
+
+    entities, names = pd.factorize(frame['text'])
+    names = np.asarray(names, dtype=object)
+    documents = frame.groupby('doc_hash', sort=False).ngroup().to_numpy()
+
+    if mode == COOCCURRENCE_DOCUMENT:
+        units, unit_entities, anchors = documents, entities, None
+    else:
+        # One unit per mention: the entities mentioned from it up to passage_size characters
+        # on. Each mention counts a pair once, however often the other entity follows it
+        starts = frame['start_char'].to_numpy().astype(np.int64)
+        order = np.lexsort((starts, documents))
+        positions = documents[order].astype(np.int64) * (int(starts.max()) + passage_size + 1) + starts[order]
+        ends = np.searchsorted(positions, positions + passage_size, side='left')
+        lengths = ends - np.arange(len(order))
+        units = np.repeat(np.arange(len(order)), lengths)
+        members = units + np.arange(len(units)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        anchors = sparse.csr_matrix((np.ones(len(order)), (np.arange(len(order)), entities[order])),
+                                    shape=(len(order), len(names)))
+        unit_entities = entities[order][members]
+    unit_count = int(units.max()) + 1
+
+    matrix = sparse.csr_matrix((np.ones(len(units)), (units, unit_entities)), shape=(unit_count, len(names)))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0  # Whether an entity is in a unit, not how often
+
+    unit_counts = np.asarray(matrix.sum(axis=0)).ravel()
+    mention_counts = np.bincount(entities, minlength=len(names))
+    if len(names) > max_entities:
+        keep = np.sort(np.argsort(-unit_counts, kind='stable')[:max_entities])
+        matrix = matrix[:, keep]
+        if anchors is not None:
+            anchors = anchors[:, keep]
+        names, unit_counts, mention_counts = names[keep], unit_counts[keep], mention_counts[keep]
+
+    if anchors is None:
+        pairs = matrix.T @ matrix
+    else:
+        # Mentions of a followed by b plus mentions of b followed by a
+        pairs = anchors.T @ matrix
+        pairs = pairs + pairs.T
+    pairs = sparse.triu(pairs, k=1).tocoo()
+    sources, targets, counts = pairs.row, pairs.col, pairs.data
+
+    # PMI = log(P(a, b) / (P(a) P(b))); NPMI scales it to at most 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pmi = np.log(counts * unit_count / (unit_counts[sources] * unit_counts[targets]))
+        npmi = np.where(counts < unit_count, pmi / -np.log(counts / unit_count), 1.0)
+    keep = (counts >= min_count) & (npmi >= min_npmi - 1e-9)
+    order = np.flatnonzero(keep)
+    order = order[np.lexsort((-npmi[order], -counts[order]))]
+    sources, targets = sources[order], targets[order]
+    counts, npmi = counts[order].astype(np.int64), npmi[order]
+
+    # Nodes take the colour of the label the entity was found with most often
+    labels = frame.groupby(['text', 'label']).size().reset_index(name='count')
+    labels = labels.sort_values('count', ascending=False, kind='stable').drop_duplicates('text')
+    labels = dict(zip(labels['text'], labels['label']))
+    unit_name = 'documents' if mode == COOCCURRENCE_DOCUMENT else 'passages'
+
+    for index in np.unique(np.concatenate((sources, targets))).tolist():
+        name = names[index]
+        label = labels[name]
+        size = 10 + 4 * math.log2(max(int(mention_counts[index]), 1))
+        graph.add_node(name, LABEL_COLORS.get(label, DEFAULT_COLOR), size,
+                       title=f'{label}, {mention_counts[index]} mentions in {int(unit_counts[index])} {unit_name}')
+
+    for source, target, count, score in zip(names[sources].tolist(), names[targets].tolist(),
+                                            counts.tolist(), npmi.tolist()):
+        graph.add_edge(source, target, EDGE_COLOR, count)
+        key = (source, target) if source <= target else (target, source)
+        graph.edge_titles[key] = f'{count} co-occurrences, NPMI {score:.2f}'
+    return graph
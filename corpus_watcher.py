@@ -0,0 +1,237 @@
+import os
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from document_extraction import is_supported_document
+from job_scheduler import Job, PRIORITY_BACKGROUND
+
+# Changes are collected for this long before they are reported, so a folder copied
+# into the corpus arrives as one batch instead of one update per file
+DEBOUNCE_INTERVAL = 1000
+
+# Directory watches only report added, removed and renamed files. A periodic rescan
+# catches files modified in place, and everything when watches can't be set up. It runs
+# as a job, stat-ing the whole tree on the GUI thread would freeze the window
+POLL_INTERVAL = 30000
+FALLBACK_POLL_INTERVAL = 5000
+
+
+def file_signature(entry):
+    stat = entry.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def scan_directory(directory):
+    # Returns ({document path: (size, mtime)}, [subdirectory paths]) for one directory level
+    files = {}
+    subdirectories = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.is_file() and is_supported_document(entry.name):
+                        files[entry.path] = file_signature(entry)
+                except OSError:
+                    continue
+    except FileNotFoundError:
+        pass  # Deleted since it was listed
+    except OSError as e:
+        print(f"Error scanning directory {directory}: {e}")
+    return files, subdirectories
+
+
+def walk_tree(directory):
+    # Full scan below directory: {directory: ({document path: (size, mtime)}, set of
+    # subdirectories)} in walk order
+    tree = {}
+    stack = [directory]
+    while stack:
+        directory = stack.pop()
+        files, subdirectories = scan_directory(directory)
+        tree[directory] = (files, set(subdirectories))
+        stack.extend(reversed(subdirectories))
+    return tree
+
+
+class CorpusPollThread(Job):
+    # The fresh tree and the watcher's generation when the scan started
+    tree_scanned = pyqtSignal(object, int)
+
+    def __init__(self, directory_path, generation):
+        super(CorpusPollThread, self).__init__()
+        self.directory_path = directory_path
+        self.generation = generation
+
+    def run(self):
+        tree = walk_tree(self.directory_path)
+        if not self.is_cancelled():
+            self.tree_scanned.emit(tree, self.generation)
+
+
+class CorpusWatcher(QObject):
+    # Lists of added, changed and removed document paths
+    corpus_changed = pyqtSignal(list, list, list)
+
+    def __init__(self, directory_path, job_scheduler, parent=None):
+        super().__init__(parent)
+        self.directory_path = directory_path
+        self.job_scheduler = job_scheduler
+
+        # directory -> ({document path: (size, mtime)}, set of subdirectories)
+        self.tree = {}
+        # Whether the tree still matches the disk: set by a scan, cleared while nothing watches
+        self.tree_is_current = False
+        # Bumped whenever the tree changes, a poll that started before is out of date
+        self.generation = 0
+        self.poll_thread = None
+
+        self.watcher = None
+        self.watching = False
+        self.watch_failed = False
+        self.dirty_directories = set()
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(DEBOUNCE_INTERVAL)
+        self.debounce_timer.timeout.connect(self.process_changes)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def scan(self):
+        # Full scan of the directory tree; returns the document paths in walk order
+        self.tree = {}
+        added = []
+        self.add_tree(self.directory_path, added)
+        self.tree_is_current = True
+        return added
+
+    def set_watching(self, enabled):
+        if not enabled:
+            self.tree_is_current = False
+        if enabled == self.watching:
+            return
+        self.watching = enabled
+
+        if enabled:
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.directoryChanged.connect(self.directory_changed)
+            self.watch_failed = False
+            for directory in self.tree:
+                self.watch_directory(directory)
+            self.poll_timer.start(FALLBACK_POLL_INTERVAL if self.watch_failed else POLL_INTERVAL)
+
+            # Pick up whatever changed while the corpus wasn't watched; not needed right after a scan
+            if not self.tree_is_current:
+                self.poll()
+            self.tree_is_current = True
+        else:
+            self.poll_timer.stop()
+            self.debounce_timer.stop()
+            self.dirty_directories = set()
+            self.job_scheduler.cancel(self.poll_thread)
+            self.poll_thread = None
+            if self.watcher is not None:
+                self.watcher.deleteLater()
+                self.watcher = None
+
+    def stop(self):
+        self.set_watching(False)
+
+    def watch_directory(self, directory):
+        if self.watcher is None:
+            return
+        # Fails when the system runs out of watches (e.g. inotify's max_user_watches);
+        # polling more often covers those directories
+        if not self.watcher.addPath(directory) and not self.watch_failed:
+            self.watch_failed = True
+            self.poll_timer.setInterval(FALLBACK_POLL_INTERVAL)
+
+    def directory_changed(self, directory):
+        self.dirty_directories.add(directory)
+        self.debounce_timer.start()
+
+    def process_changes(self):
+        added, changed, removed = [], [], []
+        for directory in sorted(self.dirty_directories):
+            if directory in self.tree:
+                self.rescan_directory(directory, added, changed, removed)
+        self.dirty_directories = set()
+        self.report(added, changed, removed)
+
+    def poll(self):
+        # A poll still running covers this one too
+        if self.poll_thread is not None and not self.poll_thread.isFinished():
+            return
+        self.poll_thread = CorpusPollThread(self.directory_path, self.generation)
+        self.poll_thread.tree_scanned.connect(self.tree_scanned)
+        self.job_scheduler.submit(self.poll_thread, priority=PRIORITY_BACKGROUND)
+
+    def tree_scanned(self, tree, generation):
+        # Watch events handled while the poll ran may be newer than what it saw; the
+        # next poll picks up the rest
+        if not self.watching or generation != self.generation:
+            return
+
+        old_files = {}
+        for files, _ in self.tree.values():
+            old_files.update(files)
+
+        added, changed = [], []
+        new_files = set()
+        for directory, (files, _) in tree.items():
+            if directory not in self.tree:
+                self.watch_directory(directory)
+            for path, signature in files.items():
+                new_files.add(path)
+                if path not in old_files:
+                    added.append(path)
+                elif old_files[path] != signature:
+                    changed.append(path)
+        removed = [path for path in old_files if path not in new_files]
+
+        self.tree = tree
+        self.report(added, changed, removed)
+
+    def report(self, added, changed, removed):
+        if added or changed or removed:
+            self.generation += 1
+            self.corpus_changed.emit(added, changed, removed)
+
+    def add_tree(self, directory, added):
+        for directory, (files, subdirectories) in walk_tree(directory).items():
+            self.tree[directory] = (files, subdirectories)
+            self.watch_directory(directory)
+            added.extend(files)
+
+    def remove_tree(self, directory, removed):
+        stack = [directory]
+        while stack:
+            files, subdirectories = self.tree.pop(stack.pop(), ({}, set()))
+            removed.extend(files)
+            stack.extend(subdirectories)
+
+    def rescan_directory(self, directory, added, changed, removed):
+        # Compares one directory level with the last scan; new subdirectories are
+        # scanned completely and removed ones drop every document below them
+        if not os.path.isdir(directory):
+            self.remove_tree(directory, removed)
+            return
+
+        old_files, old_subdirectories = self.tree[directory]
+        files, subdirectories = scan_directory(directory)
+        subdirectories = set(subdirectories)
+        self.tree[directory] = (files, subdirectories)
+
+        for path, signature in files.items():
+            if path not in old_files:
+                added.append(path)
+            elif old_files[path] != signature:
+                changed.append(path)
+        removed.extend(path for path in old_files if path not in files)
+
+        for subdirectory in sorted(subdirectories - old_subdirectories):
+            self.add_tree(subdirectory, added)
+        for subdirectory in old_subdirectories - subdirectories:
+            self.remove_tree(subdirectory, removed)
@@ -0,0 +1,349 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import docx
+import fitz
+
+# File types the tool knows how to read
+SUPPORTED_EXTENSIONS = ('.txt', '.docx', '.pdf')
+
+# Default location and size cap of the on-disk text cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.offline_ai_document_analysis', 'text_cache')
+DEFAULT_CACHE_SIZE = 2 * 1024 * 1024 * 1024  # 2 GB
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def is_supported_document(file_name):
+    return file_name.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def read_document_pages(document_path):
+    # Parse the document from disk one page at a time without touching the cache.
+    # TXT and DOCX files have no pages and come back as a single page
+    if document_path.lower().endswith('.txt'):
+        with open(document_path, 'r', encoding='utf-8') as f:
+            yield f.read()
+    elif document_path.lower().endswith('.docx'):
+        doc = docx.Document(document_path)
+        yield ' '.join([paragraph.text for paragraph in doc.paragraphs])
+    elif document_path.lower().endswith('.pdf'):
+        with fitz.open(document_path) as pdf_document:
+            for page in pdf_document:
+                yield page.get_text()
+    else:
+        raise ValueError(f"Unsupported file type: {document_path}")
+
+
+def read_document(document_path):
+    # Returns the full text together with the length of every page
+    pages = list(read_document_pages(document_path))
+    return ''.join(pages), [len(page) for page in pages]
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.total_size = None  # Computed lazily on the first write
+
+    def entry_path(self, document_path):
+        # One cache file per document, named after a hash of its absolute path
+        key = hashlib.sha1(os.path.abspath(document_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + '.txt')
+
+    def file_signature(self, document_path):
+        stat = os.stat(document_path)
+        return {'path': os.path.abspath(document_path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    def get_text(self, document_path):
+        signature, content = self.lookup(document_path)
+        if content is None:
+            content, page_lengths = read_document(document_path)
+            self.put(document_path, signature, content, page_lengths)
+
+        return content
+
+    def lookup(self, document_path):
+        # Returns the current signature of the document and its cached text (None on a miss)
+        signature = self.file_signature(document_path)
+        return signature, self.load(self.entry_path(document_path), signature)
+
+    def is_current(self, document_path):
+        # Returns the current signature of the document and whether its entry is up to
+        # date, from the header line alone; the text isn't read
+        signature = self.file_signature(document_path)
+        entry = self.open_entry(self.entry_path(document_path), signature)
+        if entry is not None:
+            entry[1].close()
+        return signature, entry is not None
+
+    def cached_hash(self, document_path):
+        # Content hash of an up to date entry, from the header line alone; None on a miss
+        entry = self.open_entry(self.entry_path(document_path), self.file_signature(document_path))
+        if entry is None:
+            return None
+        header, f = entry
+        f.close()
+        return header.get('hash')
+
+    def put(self, document_path, signature, content, page_lengths):
+        header = dict(signature, pages=page_lengths, hash=content_hash(content))
+        self.store(self.entry_path(document_path), header, [content])
+
+    def open_entry(self, entry_path, signature):
+        # The first line of a cache file holds the signature of the source document, the
+        # length of each page and the hash of the text; a size or mtime mismatch means the
+        # entry is stale. Returns (header, open file positioned at the text) or None on a miss
+        try:
+            f = open(entry_path, 'r', encoding='utf-8', errors='surrogatepass', newline='')
+        except OSError:
+            return None
+
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            f.close()
+            return None
+
+        if {key: header.get(key) for key in signature} != signature or 'pages' not in header:
+            f.close()
+            return None
+
+        # Touch the entry so eviction drops the least recently used documents first
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        return header, f
+
+    def load(self, entry_path, signature):
+        entry = self.open_entry(entry_path, signature)
+        if entry is None:
+            return None
+
+        _, f = entry
+        try:
+            return f.read()
+        except (OSError, ValueError):
+            return None
+        finally:
+            f.close()
+
+    def iter_pages(self, document_path):
+        # Yields (page_number, offset, text) for every page. Cached documents are read
+        # back one page at a time; uncached ones are parsed page by page while the
+        # text is spooled to disk, so memory stays bounded by the largest page
+        signature = self.file_signature(document_path)
+        entry_path = self.entry_path(document_path)
+
+        entry = self.open_entry(entry_path, signature)
+        if entry is not None:
+            header, f = entry
+            with f:
+                offset = 0
+                for page_number, length in enumerate(header['pages'], start=1):
+                    text = f.read(length)
+                    yield page_number, offset, text
+                    offset += length
+            return
+
+        page_lengths = []
+        digest = hashlib.sha1()
+        offset = 0
+        with tempfile.TemporaryFile('w+', encoding='utf-8', errors='surrogatepass', newline='') as body:
+            for page_number, text in enumerate(read_document_pages(document_path), start=1):
+                body.write(text)
+                digest.update(text.encode('utf-8', errors='surrogatepass'))
+                page_lengths.append(len(text))
+                yield page_number, offset, text
+                offset += len(text)
+
+            # Only reached when the whole document was read, a partial entry is never stored
+            body.seek(0)
+            header = dict(signature, pages=page_lengths, hash=digest.hexdigest())
+            self.store(entry_path, header, iter(lambda: body.read(1024 * 1024), ''))
+
+    def store(self, entry_path, header, chunks):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            old_size = os.path.getsize(entry_path) if os.path.exists(entry_path) else 0
+
+            # Write to a temporary file first so readers never see a partial entry
+            temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8', errors='surrogatepass', newline='') as f:
+                f.write(json.dumps(header) + '\n')
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temp_path, entry_path)
+            new_size = os.path.getsize(entry_path)
+        except OSError as e:
+            print(f"Error writing cache entry {entry_path}: {e}")
+            return
+
+        with self.lock:
+            if self.total_size is None:
+                self.total_size = self.compute_total_size()
+            else:
+                self.total_size += new_size - old_size
+
+            if self.total_size > self.max_size:
+                self.evict()
+
+    def scan_entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.txt'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def compute_total_size(self):
+        return sum(size for _, size, _ in self.scan_entries())
+
+    def evict(self):
+        # Remove least recently used entries until the cache is back under 90% of its cap
+        entries = sorted(self.scan_entries())
+
+        target_size = self.max_size * 0.9
+        for _, size, path in entries:
+            if self.total_size <= target_size:
+                break
+            try:
+                os.remove(path)
+                self.total_size -= size
+            except OSError:
+                pass
+
+    def invalidate(self, document_path):
+        entry_path = self.entry_path(document_path)
+        with self.lock:
+            try:
+                size = os.path.getsize(entry_path)
+                os.remove(entry_path)
+                if self.total_size is not None:
+                    self.total_size -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            if os.path.isdir(self.cache_dir):
+                shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self.total_size = 0
+
+
+# Shared cache used by every tab and worker thread
+text_cache = ExtractionCache()
+
+
+def get_document_text(document_path):
+    return text_cache.get_text(document_path)
+
+
+def iter_document_pages(document_path):
+    return text_cache.iter_pages(document_path)
+
+
+def cached_content_hash(document_path):
+    return text_cache.cached_hash(document_path)
+
+
+def extract_worker(document_path):
+    # Runs inside a worker process. Errors are returned instead of raised so that
+    # one unreadable file does not stop the rest of the batch
+    try:
+        content, page_lengths = read_document(document_path)
+        return document_path, content, page_lengths, None
+    except Exception as e:
+        return document_path, None, None, str(e)
+
+
+def iter_document_texts(document_list, max_workers=None):
+    # Yields (document_path, content, error) for every document. Cached documents
+    # come back immediately, the rest are extracted in a process pool and yielded
+    # in completion order. Exactly one of content and error is None
+    pending = {}
+    for document_path in document_list:
+        try:
+            signature, content = text_cache.lookup(document_path)
+        except OSError as e:
+            yield document_path, None, str(e)
+            continue
+
+        if content is None:
+            pending[document_path] = signature
+        else:
+            yield document_path, content, None
+
+    yield from extract_documents(pending, max_workers)
+
+
+def warm_document_cache(document_list, max_workers=None):
+    # Yields (document_path, error) for every document once its cache entry is up to
+    # date. Entries are checked by their header line only; just the misses are read
+    pending = {}
+    for document_path in document_list:
+        try:
+            signature, cached = text_cache.is_current(document_path)
+        except OSError as e:
+            yield document_path, str(e)
+            continue
+
+        if cached:
+            yield document_path, None
+        else:
+            pending[document_path] = signature
+
+    for document_path, content, error in extract_documents(pending, max_workers):
+        yield document_path, error
+
+
+def extract_documents(pending, max_workers=None):
+    # Extracts {document_path: signature} into the cache, in a process pool when there
+    # is more than one, and yields (document_path, content, error) in completion order
+    if not pending:
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+
+    # Not worth starting processes for a single document
+    if max_workers == 1 or len(pending) == 1:
+        for document_path, signature in pending.items():
+            document_path, content, page_lengths, error = extract_worker(document_path)
+            if error is None:
+                text_cache.put(document_path, signature, content, page_lengths)
+            yield document_path, content, error
+        return
+
+    # Spawn rather than fork, forking a process that is running Qt threads is unsafe
+    executor = ProcessPoolExecutor(max_workers=min(max_workers, len(pending)),
+                                   mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = {executor.submit(extract_worker, document_path): document_path for document_path in pending}
+        for future in as_completed(futures):
+            document_path = futures[future]
+            try:
+                document_path, content, page_lengths, error = future.result()
+            except Exception as e:
+                # A crashed worker (e.g. a PDF that segfaults the parser) only fails its own files
+                document_path, content, page_lengths, error = document_path, None, None, str(e)
+
+            if error is None:
+                text_cache.put(document_path, pending[document_path], content, page_lengths)
+            yield document_path, content, error
+    finally:
+        # Also reached when the caller stops iterating early, drop the work still queued
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,244 @@
+import re
+import fitz
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QTextEdit
+from PyQt5.QtGui import QTextCursor, QTextCharFormat, QSyntaxHighlighter, QColor
+from PyQt5.QtCore import QPoint
+
+from document_extraction import get_document_text
+from nlp_model import text_boundary
+
+# TXT and DOCX files have no pages of their own; they are shown in pages of about this many characters
+VIEWER_PAGE_SIZE = 20000
+
+# Pages held by the viewer at a time; the rest are loaded when they are scrolled to
+LOADED_PAGES = 3
+
+# Distance in pixels from the top or bottom at which the neighbouring page is loaded
+SCROLL_MARGIN = 200
+
+
+def split_pages(text, page_size=VIEWER_PAGE_SIZE):
+    # Returns [(start, end)] cutting text at paragraph, sentence or line boundaries
+    spans = []
+    start = 0
+    while start < len(text):
+        end = min(start + page_size, len(text))
+        if end < len(text):
+            end = text_boundary(text, start + page_size // 2, end)
+        spans.append((start, end))
+        start = end
+    return spans or [(0, 0)]
+
+
+class DocumentPages:
+    # Random access to the pages of one document. PDF pages are read from the file
+    # only when they are shown, so opening a large PDF doesn't extract all of it
+    def __init__(self, document_path):
+        self.document_path = document_path
+        self.pdf_document = None
+        self.text = None
+        self.spans = None
+
+        if document_path.lower().endswith('.pdf'):
+            self.pdf_document = fitz.open(document_path)
+            self.page_count = self.pdf_document.page_count
+        else:
+            self.text = get_document_text(document_path)
+            self.spans = split_pages(self.text)
+            self.page_count = len(self.spans)
+
+    def page_text(self, index):
+        if self.pdf_document is not None:
+            return self.pdf_document.load_page(index).get_text()
+        start, end = self.spans[index]
+        return self.text[start:end]
+
+    def close(self):
+        if self.pdf_document is not None:
+            self.pdf_document.close()
+            self.pdf_document = None
+
+
+class SearchTermHighlighter(QSyntaxHighlighter):
+    # Qt calls highlightBlock for the paragraphs that are added or changed, so only the
+    # pages loaded in the viewer are ever highlighted, each with one pass of one pattern
+    def __init__(self, document):
+        super().__init__(document)
+        self.pattern = None
+        self.highlight_format = QTextCharFormat()
+        self.highlight_format.setBackground(QColor("yellow"))
+
+    def set_search_terms(self, search_terms):
+        # Terms match anywhere in a word and the highlight runs to the end of that word.
+        # Longest first so a term is never cut short by another term that is its prefix
+        search_terms = sorted(set(term for term in search_terms if term), key=len, reverse=True)
+        pattern = None
+        if search_terms:
+            pattern = re.compile('(?:' + '|'.join(map(re.escape, search_terms)) + r')\w*', re.IGNORECASE)
+
+        if pattern != self.pattern:
+            self.pattern = pattern
+            self.rehighlight()
+
+    def highlightBlock(self, text):
+        if self.pattern is None:
+            return
+        for match in self.pattern.finditer(text):
+            self.setFormat(match.start(), match.end() - match.start(), self.highlight_format)
+
+
+class PagedDocumentViewer(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pages = None
+        self.loaded_pages = []  # [(page index, number of characters in the text view)] in display order
+        self.updating = False
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        page_controls_layout = QHBoxLayout()
+        page_controls_layout.addWidget(QLabel('Page:'))
+        self.page_spinbox = QSpinBox()
+        self.page_spinbox.setMinimum(1)
+        self.page_spinbox.setMaximum(1)
+        self.page_spinbox.valueChanged.connect(lambda value: self.show_page(value - 1))
+        page_controls_layout.addWidget(self.page_spinbox)
+        self.page_count_label = QLabel('of 0')
+        page_controls_layout.addWidget(self.page_count_label)
+        page_controls_layout.addStretch()
+        layout.addLayout(page_controls_layout)
+
+        self.text_view = QTextEdit()
+        self.text_view.setReadOnly(True)
+        self.text_view.verticalScrollBar().valueChanged.connect(self.scrolled)
+        layout.addWidget(self.text_view)
+
+        self.highlighter = SearchTermHighlighter(self.text_view.document())
+
+        self.setLayout(layout)
+
+    def open_document(self, document_path):
+        # Raises if the document can't be opened; the viewer is left empty in that case
+        self.clear()
+        self.pages = DocumentPages(document_path)
+
+        self.page_spinbox.blockSignals(True)
+        self.page_spinbox.setMaximum(max(self.pages.page_count, 1))
+        self.page_spinbox.setValue(1)
+        self.page_spinbox.blockSignals(False)
+        self.page_count_label.setText(f'of {self.pages.page_count}')
+
+        self.show_page(0)
+
+    def document_path(self):
+        return None if self.pages is None else self.pages.document_path
+
+    def clear(self):
+        if self.pages is not None:
+            self.pages.close()
+            self.pages = None
+        self.loaded_pages = []
+        self.text_view.clear()
+        self.page_count_label.setText('of 0')
+
+    def show_page(self, index):
+        if self.pages is None or self.updating:
+            return
+
+        self.updating = True
+        try:
+            self.loaded_pages = []
+            self.text_view.clear()
+            for page in range(index, min(index + LOADED_PAGES, self.pages.page_count)):
+                self.append_page(page)
+            self.fill_view()
+            self.text_view.verticalScrollBar().setValue(0)
+        finally:
+            self.updating = False
+
+    def append_page(self, index):
+        # Every page ends with a block separator so pages never share a paragraph
+        document = self.text_view.document()
+        before = document.characterCount()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.setCharFormat(QTextCharFormat())
+        cursor.insertText(self.pages.page_text(index))
+        cursor.insertBlock()
+        self.loaded_pages.append((index, document.characterCount() - before))
+
+    def fill_view(self):
+        # Short pages may not fill the view, and without a scroll range there is no scrolling to load more
+        scroll_bar = self.text_view.verticalScrollBar()
+        while self.loaded_pages and scroll_bar.maximum() <= SCROLL_MARGIN and self.loaded_pages[-1][0] + 1 < self.pages.page_count:
+            self.append_page(self.loaded_pages[-1][0] + 1)
+
+    def prepend_page(self, index):
+        document = self.text_view.document()
+        before = document.characterCount()
+        cursor = QTextCursor(document)
+        cursor.setCharFormat(QTextCharFormat())
+        cursor.insertText(self.pages.page_text(index))
+        cursor.insertBlock()
+        self.loaded_pages.insert(0, (index, document.characterCount() - before))
+
+    def remove_page(self, first):
+        if first:
+            start = 0
+            index, length = self.loaded_pages.pop(0)
+        else:
+            index, length = self.loaded_pages.pop()
+            start = sum(length for _, length in self.loaded_pages)
+
+        cursor = QTextCursor(self.text_view.document())
+        cursor.setPosition(start)
+        cursor.setPosition(start + length, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def first_page_height(self):
+        # Height in pixels of the first loaded page: where the block after it starts
+        document = self.text_view.document()
+        block = document.findBlock(self.loaded_pages[0][1])
+        return document.documentLayout().blockBoundingRect(block).top()
+
+    def scrolled(self, value):
+        if self.pages is None or self.updating or not self.loaded_pages:
+            return
+
+        scroll_bar = self.text_view.verticalScrollBar()
+        self.updating = True
+        try:
+            last_index = self.loaded_pages[-1][0]
+            first_index = self.loaded_pages[0][0]
+
+            if value >= scroll_bar.maximum() - SCROLL_MARGIN and last_index + 1 < self.pages.page_count:
+                self.append_page(last_index + 1)
+                if len(self.loaded_pages) > LOADED_PAGES:
+                    # Keep the same text on screen while the page above it goes away
+                    height = self.first_page_height()
+                    self.remove_page(True)
+                    scroll_bar.setValue(scroll_bar.value() - int(height))
+                self.fill_view()
+
+            elif value <= SCROLL_MARGIN and first_index > 0:
+                self.prepend_page(first_index - 1)
+                scroll_bar.setValue(scroll_bar.value() + int(self.first_page_height()))
+                if len(self.loaded_pages) > LOADED_PAGES:
+                    self.remove_page(False)
+        finally:
+            self.updating = False
+
+        self.update_current_page()
+
+    def update_current_page(self):
+        # The page at the top of the view
+        position = self.text_view.cursorForPosition(QPoint(0, 0)).position()
+        for index, length in self.loaded_pages:
+            if position < length:
+                break
+            position -= length
+
+        self.page_spinbox.blockSignals(True)
+        self.page_spinbox.setValue(index + 1)
+        self.page_spinbox.blockSignals(False)
@@ -1,8 +1,12 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QLabel, QFileDialog, QScrollArea, QMenu, QAction
-from PyQt5.QtGui import QFont, QClipboard
-from PyQt5.QtCore import Qt
-import pandas as pd
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QLabel, QFileDialog, QScrollArea, QMenu, QAction, QShortcut
+from PyQt5.QtGui import QFont, QClipboard, QKeySequence
+from PyQt5.QtCore import Qt, QTimer
+
+from tag_table import TagTable
+
+# Edits are written to the CSV file once they have stopped for this many milliseconds
+SAVE_DELAY = 2000
 
 class TagWidget(QWidget):
     def __init__(self, tag, editor_tab):
@@ -47,50 +51,12 @@ class TagWidget(QWidget):
         clipboard.setText(self.tag, QClipboard.Clipboard)
 
     def deleteTag(self):
-        # Delete the tag from the UI
-        self.setParent(None)
-
-        # Delete the tag from the CSV file and save it
-        if self.editor_tab.csv_file:
-            df = pd.read_csv(self.editor_tab.csv_file)
-
-            # Find the corresponding row in the CSV
-            selected_rows = df[df.iloc[:, 1].str.contains(self.tag, na=False, regex=False)].index
-
-            # Check if the tag exists in the DataFrame
-            if not selected_rows.empty:
-                # Remove the tag from the DataFrame
-                df[df.columns[1]] = df.apply(
-                    lambda row: self.process_tags(row[df.columns[1]], self.tag),
-                    axis=1
-                )
-
-                # Save the updated DataFrame to the CSV file
-                df.to_csv(self.editor_tab.csv_file, index=False)
-
-    def process_tags(self, tags_str, tag_to_remove):
-        # Custom function to handle NaN values and remove the specified tag
-        if pd.notna(tags_str):
-            tags = [tag.strip() for tag in tags_str.split(', ')]
-            tags = [tag for tag in tags if tag != tag_to_remove]
-            return ', '.join(tags)
-        return tags_str
+        # Delete the tag from the selected row
+        self.editor_tab.deleteTag(self.tag)
 
     def deleteAllTags(self):
-        # Delete all occurrences of the tag from the UI and CSV file
-        self.setParent(None)
-
-        if self.editor_tab.csv_file:
-            df = pd.read_csv(self.editor_tab.csv_file)
-
-            # Remove the tag from all rows
-            df[df.columns[1]] = df.apply(
-                lambda row: self.process_tags(row[df.columns[1]], self.tag),
-                axis=1
-            )
-
-            # Save the updated DataFrame to the CSV file
-            df.to_csv(self.editor_tab.csv_file, index=False)
+        # Delete all occurrences of the tag from every row
+        self.editor_tab.deleteAllTags(self.tag)
 
 
 class EditorTab(QWidget):
@@ -98,6 +64,14 @@ class EditorTab(QWidget):
         super().__init__()
 
         self.csv_file = None  # Initialize the csv_file attribute
+        self.tag_table = None  # The loaded CSV, edited in memory
+        self.current_key = None  # First column value of the row on display
+
+        # Edits are batched into one write of the file
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_DELAY)
+        self.save_timer.timeout.connect(self.saveChanges)
 
         self.initUI()
 
@@ -113,6 +87,8 @@ class EditorTab(QWidget):
         # Set up a vertical layout for the left sidebar
         left_sidebar_layout = QVBoxLayout()
         left_sidebar_layout.addWidget(QPushButton('Upload CSV', clicked=self.uploadCSV))
+        left_sidebar_layout.addWidget(QPushButton('Undo', clicked=self.undo))
+        QShortcut(QKeySequence.Undo, self, activated=self.undo)
         left_sidebar_layout.addWidget(self.list_widget)
 
         # Create a scroll area for the right side content (Container for tag widgets)
@@ -140,48 +116,69 @@ class EditorTab(QWidget):
         csv_file, _ = file_dialog.getOpenFileName(self, 'Open CSV File', '', 'CSV Files (*.csv)')
 
         if csv_file:
-            # Read the CSV file using pandas
-            df = pd.read_csv(csv_file)
+            # Pending edits of the previous file are written first
+            self.saveChanges()
+
+            # Read the CSV file once; clicks and edits work on the copy in memory
+            try:
+                tag_table = TagTable(csv_file)
+            except Exception as e:
+                print(f"Error reading CSV file: {e}")
+                return
+            self.tag_table = tag_table
+            self.current_key = None
+            self.clearTags()
 
             # Populate the left sidebar with the first column values
             self.list_widget.clear()
-            self.list_widget.addItems(df.iloc[:, 0].astype(str))
+            self.list_widget.addItems(tag_table.keys)
 
             # Set the csv_file attribute
             self.csv_file = csv_file
 
     def showContent(self, item):
-        # Get the selected item's text
-        selected_text = item.text()
-
-        # Check if csv_file is defined
-        if self.csv_file:
-            # Read the CSV file using pandas
-            df = pd.read_csv(self.csv_file)
-
-            # Find the corresponding row in the CSV and display the second column in the right-side container
-            selected_row = df[df.iloc[:, 0] == selected_text]
-
-            if not selected_row.empty:
-                # Check if the second column is not empty or NaN
-                if pd.notna(selected_row.iloc[0, 1]) and selected_row.iloc[0, 1] != '':
-                    second_column_value = selected_row.iloc[0, 1]
-
-                    # Process comma-separated values and create a TagWidget for each tag
-                    tags = [tag.strip() for tag in second_column_value.split(', ')]
-                    tag_widgets = [TagWidget(tag, self) for tag in tags]
-
-                    # Clear existing tag widgets in the container
-                    for i in reversed(range(self.tags_container.layout().count())):
-                        self.tags_container.layout().itemAt(i).widget().setParent(None)
-
-                    # Add the new tag widgets to the container
-                    for tag_widget in tag_widgets:
-                        self.tags_container.layout().addWidget(tag_widget)
-                else:
-                    # You can choose to display a message or do nothing
-                    pass
-
+        self.current_key = item.text()
+        self.showTags()
+
+    def showTags(self):
+        # Show the tags of the selected row, one TagWidget each
+        self.clearTags()
+        if self.tag_table is None or self.current_key is None:
+            return
+        for tag in self.tag_table.tags(self.current_key):
+            self.tags_container.layout().addWidget(TagWidget(tag, self))
+
+    def clearTags(self):
+        # Clear existing tag widgets in the container
+        for i in reversed(range(self.tags_container.layout().count())):
+            self.tags_container.layout().itemAt(i).widget().setParent(None)
+
+    def deleteTag(self, tag):
+        if self.tag_table is None or self.current_key is None:
+            return
+        self.tag_table.remove_tag(self.current_key, tag)
+        self.showTags()
+        self.save_timer.start()
+
+    def deleteAllTags(self, tag):
+        if self.tag_table is None:
+            return
+        self.tag_table.remove_tag_everywhere(tag)
+        self.showTags()
+        self.save_timer.start()
+
+    def undo(self):
+        if self.tag_table is None:
+            return
+        if self.current_key in self.tag_table.undo():
+            self.showTags()
+        self.save_timer.start()
+
+    def saveChanges(self):
+        # Writes the CSV file if anything changed since it was last written
+        self.save_timer.stop()
+        if self.tag_table is not None:
+            self.tag_table.save()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,118 @@
+import json
+import math
+from pyvis.node import Node
+from pyvis.edge import Edge
+
+# Child nodes take the colour of their column; main nodes are always blue
+NODE_COLORS = ["blue", "red", "green", "purple", "orange", "brown", "pink", "gray", "cyan", "magenta"]
+MAIN_NODE_COLOR = "blue"
+MAIN_NODE_SIZE = 25
+CHILD_NODE_SIZE = 15
+MAX_EDGE_WIDTH = 10
+
+
+class NetworkGraph:
+    def __init__(self):
+        # Dicts keep insertion order and make every duplicate check a hash lookup
+        self.nodes = {}  # node id -> (color, size)
+        self.edges = {}  # (node id, node id) -> color, one entry per pair in either direction
+        self.edge_weights = {}  # Same keys as edges -> number of times the pair was linked
+
+        # Only for nodes whose label isn't their id, or that have a hover text
+        self.node_labels = {}
+        self.node_titles = {}
+        self.edge_titles = {}  # Hover text replacing the number of links
+
+    def add_node(self, node_id, color, size, label=None, title=None):
+        # Like pyvis, the first time a node is added decides how it looks
+        if node_id not in self.nodes:
+            self.nodes[node_id] = (color, size)
+            if label is not None:
+                self.node_labels[node_id] = label
+            if title is not None:
+                self.node_titles[node_id] = title
+
+    def add_edge(self, source, target, color, weight=1):
+        key = (source, target) if source <= target else (target, source)
+        if key not in self.edges:
+            self.edges[key] = color
+            self.edge_weights[key] = weight
+        else:
+            self.edge_weights[key] += weight
+
+    def degrees(self):
+        # Weighted degree of every node
+        degrees = dict.fromkeys(self.nodes, 0)
+        for (source, target), weight in self.edge_weights.items():
+            degrees[source] += weight
+            degrees[target] += weight
+        return degrees
+
+
+def build_graph(rows, colors=NODE_COLORS):
+    # rows holds the main node followed by cells of comma separated child nodes;
+    # every child gets an edge to the main node of its row
+    graph = NetworkGraph()
+    for row in rows:
+        if not row:
+            continue
+        main_node = (row[0] or '').strip()
+        if not main_node:
+            continue
+
+        graph.add_node(main_node, MAIN_NODE_COLOR, MAIN_NODE_SIZE)
+        for col in range(1, len(row)):
+            cell = (row[col] or '').strip()
+            if not cell:
+                continue
+
+            color = colors[col % len(colors)]
+            for child_node in cell.split(','):
+                child_node = child_node.strip()
+                if child_node:
+                    graph.add_node(child_node, color, CHILD_NODE_SIZE)
+                    graph.add_edge(main_node, child_node, color)
+    return graph
+
+
+def edge_id(key):
+    # Edges get explicit ids so the page can remove them again when the sheet changes
+    return json.dumps(key, ensure_ascii=False)
+
+
+def node_options(graph, node_id, font_color):
+    # The vis.js options of one node, as pyvis would create them
+    color, size = graph.nodes[node_id]
+    options = Node(node_id, 'dot', label=graph.node_labels.get(node_id, node_id), color=color,
+                   font_color=font_color, size=size).options
+    if node_id in graph.node_titles:
+        options['title'] = graph.node_titles[node_id]
+    return options
+
+
+def edge_options(graph, key, directed):
+    options = Edge(key[0], key[1], directed, color=graph.edges[key]).options
+    options['id'] = edge_id(key)
+    weight = graph.edge_weights[key]
+    if weight > 1:
+        # Pairs linked more than once are drawn thicker
+        options['width'] = min(1 + math.log2(weight), MAX_EDGE_WIDTH)
+        options['title'] = f'{weight} links'
+    if key in graph.edge_titles:
+        options['title'] = graph.edge_titles[key]
+    return options
+
+
+def add_graph_to_network(graph, net):
+    # Hands pyvis the prebuilt graph in one go. Network.add_node and add_edge look for
+    # duplicates in plain lists, which makes adding a large graph quadratic
+    for node_id in graph.nodes:
+        if node_id in net.node_map:
+            continue
+        options = node_options(graph, node_id, net.font_color)
+        net.nodes.append(options)
+        net.node_ids.append(node_id)
+        net.node_map[node_id] = options
+
+    for key in graph.edges:
+        net.edges.append(edge_options(graph, key, net.directed))
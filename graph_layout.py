@@ -0,0 +1,155 @@
+import json
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+# From this many nodes on the map is drawn with a precomputed layout, browser physics
+# takes minutes to settle on graphs this large
+STATIC_LAYOUT_MIN_NODES = 1000
+
+# Up to this many nodes repulsion is computed between all pairs; above it every node
+# is pushed away from a random sample of REPULSION_SAMPLES nodes per iteration
+EXACT_REPULSION_NODES = 1000
+REPULSION_SAMPLES = 64
+
+LAYOUT_ITERATIONS = 60
+GRAVITY = 0.05
+
+# Layouts of the most recently drawn graphs
+LAYOUT_CACHE_SIZE = 16
+layout_cache = OrderedDict()
+
+
+def graph_hash(graph):
+    # Same nodes and edges in the same order give the same hash
+    data = json.dumps([list(graph.nodes), list(graph.edges)], ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def force_directed_layout(node_count, sources, targets, iterations=LAYOUT_ITERATIONS, seed=0):
+    # Fruchterman-Reingold with every step vectorized: returns an (node_count, 2) array.
+    # sources and targets are arrays of node indexes, one entry per edge
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-1.0, 1.0, node_count)
+    y = rng.uniform(-1.0, 1.0, node_count)
+    if node_count < 2:
+        return np.column_stack((x, y))
+
+    k2 = 4.0 / node_count  # Squared ideal distance between nodes in a 2x2 square
+    k = np.sqrt(k2)
+    temperature = 0.2
+
+    for iteration in range(iterations):
+        # Repulsion k^2 / distance between pairs of nodes
+        if node_count <= EXACT_REPULSION_NODES:
+            others = slice(None)
+            scale = 1.0
+        else:
+            others = rng.choice(node_count, REPULSION_SAMPLES, replace=False)
+            scale = node_count / REPULSION_SAMPLES
+        dx = x[:, np.newaxis] - x[np.newaxis, others]
+        dy = y[:, np.newaxis] - y[np.newaxis, others]
+        force = dx * dx
+        force += dy * dy
+        np.maximum(force, 1e-6, out=force)
+        np.divide(k2 * scale, force, out=force)
+        displacement_x = (dx * force).sum(axis=1)
+        displacement_y = (dy * force).sum(axis=1)
+
+        # Attraction distance^2 / k along edges
+        if len(sources):
+            dx = x[sources] - x[targets]
+            dy = y[sources] - y[targets]
+            force = np.sqrt(dx * dx + dy * dy) / k
+            dx *= force
+            dy *= force
+            displacement_x += np.bincount(targets, dx, minlength=node_count) - \
+                np.bincount(sources, dx, minlength=node_count)
+            displacement_y += np.bincount(targets, dy, minlength=node_count) - \
+                np.bincount(sources, dy, minlength=node_count)
+
+        # Gravity keeps disconnected parts of the graph from drifting apart
+        displacement_x -= GRAVITY * x / k
+        displacement_y -= GRAVITY * y / k
+
+        # Move every node at most `temperature`, which cools down linearly
+        length = np.maximum(np.sqrt(displacement_x ** 2 + displacement_y ** 2), 1e-9)
+        step = np.minimum(length, temperature) / length
+        x += displacement_x * step
+        y += displacement_y * step
+        temperature = 0.2 * (1.0 - (iteration + 1) / iterations) + 0.005
+
+    return np.column_stack((x, y))
+
+
+def compute_layout(graph):
+    # Returns {node id: (x, y)} in vis.js pixel coordinates, cached by graph hash
+    key = graph_hash(graph)
+    if key in layout_cache:
+        layout_cache.move_to_end(key)
+        return layout_cache[key]
+
+    node_ids = list(graph.nodes)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    sources = np.fromiter((index[source] for source, target in graph.edges), dtype=np.intp, count=len(graph.edges))
+    targets = np.fromiter((index[target] for source, target in graph.edges), dtype=np.intp, count=len(graph.edges))
+
+    positions = force_directed_layout(len(node_ids), sources, targets)
+
+    # About 100 pixels between neighbouring nodes whatever the size of the graph
+    positions = positions * (50.0 * np.sqrt(max(len(node_ids), 1)))
+    layout = {node_id: (float(x), float(y)) for node_id, (x, y) in zip(node_ids, positions)}
+
+    layout_cache[key] = layout
+    while len(layout_cache) > LAYOUT_CACHE_SIZE:
+        layout_cache.popitem(last=False)
+    return layout
+
+
+def apply_static_layout(net, layout):
+    # Fixes every node of a pyvis Network at its precomputed position and turns off
+    # physics, so the browser draws the map at once instead of simulating it
+    for options in net.nodes:
+        position = layout.get(options['id'])
+        if position is not None:
+            options['x'], options['y'] = position
+    net.toggle_physics(False)
+    net.options.edges.smooth.enabled = False  # Straight edges are much cheaper to draw
+
+
+def place_new_nodes(graph, layout, node_ids, replaced_ids=(), seed=0):
+    # Positions for nodes added to a map that is already on screen, so the rest of the
+    # map keeps its layout: each new node goes next to the neighbours it has there, the
+    # ones without any go where the replaced nodes were (or the middle of the map).
+    # Returns a copy of layout with them added
+    layout = dict(layout)
+    rng = np.random.default_rng(seed)
+    neighbours = {node_id: [] for node_id in node_ids}
+    for source, target in graph.edges:
+        if source in neighbours:
+            neighbours[source].append(target)
+        if target in neighbours:
+            neighbours[target].append(source)
+
+    anchor = [layout[node_id] for node_id in replaced_ids if node_id in layout] or list(layout.values())
+    anchor = np.mean(anchor, axis=0) if anchor else (0.0, 0.0)
+
+    pending = list(node_ids)
+    while pending:
+        waiting = []
+        for node_id in pending:
+            placed = [layout[neighbour] for neighbour in neighbours[node_id] if neighbour in layout]
+            if placed:
+                x, y = np.mean(placed, axis=0)
+                dx, dy = rng.normal(0.0, 30.0, 2)
+                layout[node_id] = (float(x + dx), float(y + dy))
+            else:
+                waiting.append(node_id)
+        if len(waiting) == len(pending):
+            # Nothing around them on screen, not even other new nodes
+            for node_id in waiting:
+                dx, dy = rng.normal(0.0, 100.0, 2)
+                layout[node_id] = (float(anchor[0] + dx), float(anchor[1] + dy))
+            break
+        pending = waiting
+    return layout
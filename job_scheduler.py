@@ -0,0 +1,102 @@
+import heapq
+import itertools
+import threading
+from PyQt5.QtCore import QObject, QThread
+
+# Lower runs first: searches and NER the user is waiting for go ahead of background work
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class Job(QThread):
+    # Base class for background work. Subclasses call self.is_cancelled() between units of
+    # work (documents, pages, chunks) and return early when it is set; jobs are never terminated
+    def __init__(self):
+        super(Job, self).__init__()
+        self.cancel_event = threading.Event()
+        self.job_key = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.requestInterruption()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set() or self.isInterruptionRequested()
+
+
+class JobScheduler(QObject):
+    def __init__(self, max_running_jobs=3):
+        super().__init__()
+        self.max_running_jobs = max_running_jobs
+        self.queue = []  # Heap of (priority, submission order, job)
+        self.order = itertools.count()
+        self.running = set()  # Keeps running QThreads referenced until they finish
+        self.jobs_by_key = {}
+
+    def submit(self, job, key=None, priority=PRIORITY_BACKGROUND):
+        # Returns the job that will do the work: an identical job (same key) that is already
+        # queued or running is returned instead of starting the same work twice
+        if key is not None:
+            existing = self.jobs_by_key.get(key)
+            if existing is not None and not existing.is_cancelled():
+                return existing
+            self.jobs_by_key[key] = job
+
+        job.job_key = key
+        heapq.heappush(self.queue, (priority, next(self.order), job))
+        self.start_jobs()
+        return job
+
+    def cancel(self, job):
+        if job is None:
+            return
+        job.cancel()
+        self.forget(job)
+
+        # A queued job is started right away: it sees the cancellation before doing any
+        # work and finishes immediately, so its finished signal fires like for any other job
+        for index, (_, _, queued_job) in enumerate(self.queue):
+            if queued_job is job:
+                self.queue.pop(index)
+                heapq.heapify(self.queue)
+                self.start(job)
+                break
+
+        # A running job gives up its slot as soon as it is cancelled
+        self.start_jobs()
+
+    def cancel_all(self, job_type=None):
+        jobs = [job for _, _, job in self.queue] + list(self.running)
+        for job in jobs:
+            if job_type is None or isinstance(job, job_type):
+                self.cancel(job)
+
+    def forget(self, job):
+        if job.job_key is not None and self.jobs_by_key.get(job.job_key) is job:
+            del self.jobs_by_key[job.job_key]
+
+    def start(self, job):
+        self.running.add(job)
+        job.finished.connect(lambda job=job: self.job_finished(job))
+        job.start()
+
+    def start_jobs(self):
+        # Bounded concurrency. Cancelled jobs that are still winding down stay referenced but
+        # don't take a slot, so a slow chunk or page can't hold back the work replacing it
+        while self.queue and self.active_job_count() < self.max_running_jobs:
+            _, _, job = heapq.heappop(self.queue)
+            self.start(job)
+
+    def active_job_count(self):
+        return sum(1 for job in self.running if not job.is_cancelled())
+
+    def job_finished(self, job):
+        self.running.discard(job)
+        self.forget(job)
+        self.start_jobs()
+
+    def shutdown(self):
+        # Used when the application closes: stop everything and wait for running jobs to return
+        self.cancel_all()
+        for job in list(self.running):
+            job.wait()
@@ -1,131 +1,319 @@
 import os
-import docx
-import fitz
+import time
+import itertools
+import collections
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFileDialog, \
-    QTextEdit, QListWidget, QStackedWidget, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QDialog, QDialogButtonBox, QSpinBox, QStyleFactory
-from PyQt5.QtGui import QFont, QTextCharFormat, QColor, QTextCursor, QIcon
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+    QTextEdit, QListWidget, QListWidgetItem, QStackedWidget, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QDialog, QDialogButtonBox, QSpinBox, QStyleFactory, \
+    QCheckBox, QTableView, QComboBox
+from PyQt5.QtGui import QFont, QIcon
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
-from spacy.tokens import Span
-
-import spacy
 import re 
 import csv
 
 from network_map_tab import NetworkMapTab
 from reader_tab import ReaderTab
 from editor_tab import EditorTab
+from document_extraction import iter_document_texts, warm_document_cache, iter_document_pages, text_cache, \
+    content_hash, cached_content_hash
+from search_index import SearchIndex, document_contains_all
+from ner_store import ner_store
+from regex_search import compile_search_pattern, search_text, load_terms_file, SEARCH_MODE_TERMS, SEARCH_MODE_REGEX
+from search_results_model import SearchResultsModel, MAX_RESULT_LIMIT
+from nlp_model import ModelService, ner_disabled_components, chunk_spans, merge_entities, NER_CHUNK_SIZE, \
+    NER_CHUNK_OVERLAP
+from job_scheduler import Job, JobScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from corpus_watcher import CorpusWatcher
+from document_viewer import PagedDocumentViewer
+from cooccurrence import cooccurrence_graph, COOCCURRENCE_PASSAGE, COOCCURRENCE_DOCUMENT
+
+class DocumentExtractionThread(Job):
+    extraction_failed = pyqtSignal(str, str)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, document_list, max_workers=None):
+        super(DocumentExtractionThread, self).__init__()
+        self.document_list = document_list
+        self.max_workers = max_workers
 
-class NerAnalysisThread(QThread):
-    analysis_complete = pyqtSignal(dict)
+    def run(self):
+        # Warm the text cache so later searches and NER runs read from it
+        total = len(self.document_list)
+        done = 0
+        for document_path, error in warm_document_cache(self.document_list, self.max_workers):
+            if self.is_cancelled():
+                break
 
-    def __init__(self, document_list, label):
-        super(NerAnalysisThread, self).__init__()
+            done += 1
+            if error is not None:
+                self.extraction_failed.emit(document_path, error)
+            self.progress.emit(done, total)
+
+
+class IndexLoadThread(Job):
+    def __init__(self, search_index):
+        super(IndexLoadThread, self).__init__()
+        self.search_index = search_index
+
+    def run(self):
+        if self.is_cancelled():
+            return
+        self.search_index.ensure_loaded()
+
+
+class IndexBuildThread(Job):
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, search_index, document_list, removed_documents=None):
+        super(IndexBuildThread, self).__init__()
+        self.search_index = search_index
         self.document_list = document_list
-        self.label = label
+        self.removed_documents = removed_documents  # None for a full build of document_list
 
     def run(self):
-        nlp = spacy.load('en_core_web_lg')
-        document_entities = {}
+        if self.is_cancelled():
+            return
 
-        for document_path in self.document_list:
-            try:
-                if document_path.lower().endswith('.txt'):
-                    with open(document_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                elif document_path.lower().endswith('.docx'):
-                    doc = docx.Document(document_path)
-                    content = ' '.join([paragraph.text for paragraph in doc.paragraphs])
-                elif document_path.lower().endswith('.pdf'):
-                    with fitz.open(document_path) as pdf_document:
-                        content = ''
-                        for page_number in range(pdf_document.page_count):
-                            page = pdf_document[page_number]
-                            content += page.get_text()
-
-                doc = nlp(content)
-
-                if self.label == 'SUBJECT':
-                    # Combine PERSON and ORG entities into Subjects
-                    entities = set(ent.text for ent in doc.ents if ent.label_ in ['PERSON', 'ORG'])
-                elif self.label == 'PLACE':
-                    # Combine GPE and LOC entities into Places
-                    entities = set(ent.text for ent in doc.ents if ent.label_ in ['GPE', 'LOC'])
-                else:
-                    # Use the specified label as is
-                    entities = set(ent.text for ent in doc.ents if ent.label_ == self.label)
+        if self.removed_documents is None:
+            # The index saved next to the corpus is loaded when the directory is selected;
+            # only new or changed documents are indexed
+            self.search_index.ensure_loaded()
+            self.search_index.update(self.document_list, progress=self.progress.emit,
+                                     interrupted=self.is_cancelled)
+        else:
+            # Files reported by the corpus watcher; the rest of the index is left alone
+            self.search_index.apply_changes(self.document_list, self.removed_documents,
+                                            progress=self.progress.emit, interrupted=self.is_cancelled)
+        self.search_index.save()
 
-                if document_path not in document_entities:
-                    document_entities[document_path] = entities
-                else:
-                    entities -= document_entities[document_path]
 
-                self.analysis_complete.emit({document_path: entities})
+class SidebarFilterThread(Job):
+    document_matched = pyqtSignal(str)
+
+    def __init__(self, document_list, search_terms):
+        super(SidebarFilterThread, self).__init__()
+        self.document_list = document_list  # Documents the search index can't answer for yet
+        self.search_terms = search_terms
+
+    def run(self):
+        for document_path in self.document_list:
+            if self.is_cancelled():
+                return
 
+            try:
+                if document_contains_all(document_path, self.search_terms):
+                    self.document_matched.emit(document_path)
             except Exception as e:
                 print(f"Error reading file {document_path}: {e}")
 
 
+class NerAnalysisThread(Job):
+    analysis_complete = pyqtSignal(dict)
 
-class RegexSearchThread(QThread):
-    search_complete = pyqtSignal(dict)
-
-    def __init__(self, document_list, pattern, chunk_size, overlap_size):
-        super(RegexSearchThread, self).__init__()
+    def __init__(self, document_list, label, model_service, max_workers=None, batch_size=16, n_process=1,
+                 chunk_size=NER_CHUNK_SIZE, chunk_overlap=NER_CHUNK_OVERLAP):
+        super(NerAnalysisThread, self).__init__()
         self.document_list = document_list
-        self.pattern = pattern
+        self.label = label
+        self.model_service = model_service
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.n_process = n_process
         self.chunk_size = chunk_size
-        self.overlap_size = overlap_size
+        self.chunk_overlap = chunk_overlap
+
+        # doc_hash -> (index of the last chunk received, entities found so far)
+        self.partial_documents = {}
+
+        # document path -> doc_hash of every document whose entities have been emitted
+        self.document_hashes = {}
 
     def run(self):
-        search_results = {}
+        pending = self.pending_documents()
+
+        # The model is only needed when a document hasn't been analyzed before
+        first = next(pending, None)
+        if first is None:
+            return
+        pending = itertools.chain([first], pending)
+
+        try:
+            nlp = self.model_service.load()
+        except Exception as e:
+            print(f"Error loading spaCy model: {e}")
+            return
+        # Loading can take a while; don't start NER processes for a replaced analysis
+        if self.is_cancelled():
+            return
+        disabled = ner_disabled_components(nlp)
+        chunks = self.pending_chunks(pending, min(self.chunk_size, nlp.max_length))
 
+        while True:
+            # Chunks handed to nlp.pipe that haven't come back yet, in order
+            in_flight = collections.deque()
+            try:
+                # Only the components NER needs run, on batches of chunks
+                for doc, context in nlp.pipe(self.track_chunks(chunks, in_flight), as_tuples=True,
+                                             batch_size=self.batch_size, n_process=self.n_process,
+                                             disable=disabled):
+                    in_flight.popleft()
+                    self.collect_chunk(doc, context)
+                return
+            except Exception as e:
+                print(f"Error analyzing documents: {e}")
+
+            # Redo the chunks of the failed batch one at a time so only the bad one is
+            # lost, then carry on in batches with the rest. If nlp.pipe failed before taking
+            # any, everything left goes one at a time
+            for text, context in in_flight or chunks:
+                try:
+                    self.collect_chunk(next(nlp.pipe([text], disable=disabled)), context)
+                except Exception as e:
+                    print(f"Error analyzing file {context[0]}: {e}")
+
+    def track_chunks(self, chunks, in_flight):
+        for chunk in chunks:
+            in_flight.append(chunk)
+            yield chunk
+
+    def pending_chunks(self, pending, chunk_size):
+        # Splits long documents at paragraph or sentence boundaries into overlapping
+        # chunks so that no single Doc is larger than chunk_size characters
+        for content, (document_path, doc_hash) in pending:
+            spans = chunk_spans(content, chunk_size, self.chunk_overlap)
+            for index, (start, end, keep_start, keep_end) in enumerate(spans):
+                if self.is_cancelled():
+                    return
+                yield content[start:end], (document_path, doc_hash, index, len(spans), start, keep_start, keep_end)
+
+    def collect_chunk(self, doc, context):
+        document_path, doc_hash, index, chunk_count, start, keep_start, keep_end = context
+
+        # Chunks of a document arrive in order; if one was lost to an error the document
+        # is skipped rather than stored with missing entities
+        if index == 0:
+            entities = []
+        else:
+            last_index, entities = self.partial_documents.pop(doc_hash, (None, None))
+            if last_index != index - 1:
+                return
+
+        # Move offsets from the chunk to the document and drop entities owned by a neighbouring chunk
+        for ent in doc.ents:
+            start_char = start + ent.start_char
+            if keep_start <= start_char < keep_end:
+                entities.append((ent.label_, ent.text, start_char, start + ent.end_char))
+
+        if index + 1 < chunk_count:
+            self.partial_documents[doc_hash] = (index, entities)
+        else:
+            ner_store.add_document(doc_hash, merge_entities(entities))
+            self.emit_entities(document_path, doc_hash)
+
+    def pending_documents(self):
+        # Emits results for documents already in the store and yields
+        # (content, (document_path, doc_hash)) for the ones the model has to analyze.
+        # The cache keeps each text's hash in its header, so stored documents aren't read
+        unknown = []
         for document_path in self.document_list:
+            if self.is_cancelled():
+                return
+
             try:
-                if document_path.lower().endswith('.txt'):
-                    with open(document_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                elif document_path.lower().endswith('.docx'):
-                    doc = docx.Document(document_path)
-                    content = ' '.join([paragraph.text for paragraph in doc.paragraphs])
-                elif document_path.lower().endswith('.pdf'):
-                    with fitz.open(document_path) as pdf_document:
-                        content = ''
-                        for page_number in range(pdf_document.page_count):
-                            page = pdf_document[page_number]
-                            content += page.get_text()
-
-                results = self.search_in_document(content)
-                if results:
-                    search_results[document_path] = results
+                doc_hash = cached_content_hash(document_path)
+            except OSError as e:
+                print(f"Error reading file {document_path}: {e}")
+                continue
+
+            if doc_hash is not None and ner_store.has_document(doc_hash):
+                self.emit_entities(document_path, doc_hash)
+            else:
+                unknown.append(document_path)
+
+        for document_path, content, error in iter_document_texts(unknown, self.max_workers):
+            if self.is_cancelled():
+                return
+
+            if error is not None:
+                print(f"Error reading file {document_path}: {error}")
+                continue
 
+            try:
+                # Every label of the document is stored at once, so switching labels is a lookup
+                doc_hash = content_hash(content)
+                if ner_store.has_document(doc_hash):
+                    self.emit_entities(document_path, doc_hash)
+                else:
+                    yield content, (document_path, doc_hash)
             except Exception as e:
                 print(f"Error reading file {document_path}: {e}")
 
-        self.search_complete.emit(search_results)
+    def emit_entities(self, document_path, doc_hash):
+        # SUBJECT combines PERSON and ORG, PLACE combines GPE and LOC; most frequent first
+        entities = [text for text, count in ner_store.entity_counts(doc_hash, self.label)]
+        self.document_hashes[document_path] = doc_hash
+        self.analysis_complete.emit({document_path: entities})
+
+
+class CooccurrenceThread(Job):
+    graph_ready = pyqtSignal(object)
+
+    def __init__(self, doc_hashes, label, mode):
+        super(CooccurrenceThread, self).__init__()
+        self.doc_hashes = doc_hashes
+        self.label = label
+        self.mode = mode
+
+    def run(self):
+        # Reads the stored mentions, the model isn't needed
+        try:
+            graph = cooccurrence_graph(ner_store.entity_mentions(self.doc_hashes, self.label), self.mode)
+        except Exception as e:
+            print(f"Error building co-occurrence network: {e}")
+            return
+        if not self.is_cancelled():
+            self.graph_ready.emit(graph)
+
 
-    def search_in_document(self, content):
-        results = []
+class RegexSearchThread(Job):
+    results_found = pyqtSignal(str, list)
+    progress = pyqtSignal(int, int, int)
 
-        # Split the input pattern into individual terms
-        search_terms = re.split(r'\s+', self.pattern.strip())
+    def __init__(self, document_list, pattern, snippet_size, context_size):
+        super(RegexSearchThread, self).__init__()
+        self.document_list = document_list
+        self.pattern = pattern  # Compiled once by the caller
+        self.snippet_size = snippet_size
+        self.context_size = context_size
+
+    def run(self):
+        total = len(self.document_list)
+        hits = 0
 
-        for i in range(0, len(content) - self.chunk_size + 1, self.chunk_size - self.overlap_size):
-            chunk = content[i:i + self.chunk_size]
+        for done, document_path in enumerate(self.document_list, start=1):
+            if self.is_cancelled():
+                return
 
-            # Use '|'.join(search_terms) to create a regex pattern with OR operator
-            pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, search_terms)) + r')\b', re.IGNORECASE)
-            matches = pattern.finditer(chunk)
+            try:
+                # Search page by page so large PDFs are never held in memory as a whole,
+                # and so a cancel request is noticed within one page
+                results = []
+                for page_number, page_offset, page_text in iter_document_pages(document_path):
+                    if self.is_cancelled():
+                        return
+                    for result in search_text(self.pattern, page_text, self.snippet_size, self.context_size):
+                        results.append((page_number, result['snippet'], len(result['terms'])))
+
+                # Results are sent per document so the table fills up while the search runs
+                if results:
+                    hits += len(results)
+                    self.results_found.emit(document_path, results)
 
-            for match in matches:
-                start_pos = i + match.start()
-                result = {
-                    'position': start_pos,
-                    'snippet': content[start_pos:start_pos + self.chunk_size],
-                }
-                results.append(result)
+            except Exception as e:
+                print(f"Error reading file {document_path}: {e}")
 
-        return results
+            self.progress.emit(done, total, hits)
 
 
 class DocumentReaderApp(QWidget):
@@ -135,14 +323,41 @@ class DocumentReaderApp(QWidget):
         # Set the initial directory to the directory of the script
         self.directory_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Documents")
         self.document_list = []
+        self.search_index = None
+
+        # All background work (extraction, indexing, NER, regex search) goes through the scheduler
+        self.job_scheduler = JobScheduler()
+        self.extraction_thread = None
+        self.index_load_thread = None
+        self.index_build_thread = None
+        self.sidebar_filter_thread = None
+        self.ner_analysis_thread = None
+        self.cooccurrence_thread = None
+        self.regex_search_thread = None
+
+        # Keeps document_list up to date while the selected directory changes
+        self.corpus_watcher = None
+        self.pending_documents = set()  # New or changed documents not yet extracted and indexed
+        self.pending_removals = set()
+        self.removed_documents = None  # Documents the next index update removes
+
+        # One spaCy model shared by the NER and Reader tabs
+        self.model_service = ModelService()
 
         self.init_ui()
 
-        # Added variables for chunk and overlap size and maximum result size
-        self.chunk_size = 200
-        self.overlap_size = 20
+        # Added variables for snippet size, context before a match and maximum result size
+        self.snippet_size = 200
+        self.context_size = 20
         self.limit = 5000
 
+        # Number of processes used to extract documents in parallel
+        self.extraction_workers = os.cpu_count() or 1
+
+        # Documents per nlp.pipe batch and number of NER processes
+        self.ner_batch_size = 16
+        self.ner_processes = 1
+
         # Load documents initially
         self.load_documents()
 
@@ -151,6 +366,20 @@ class DocumentReaderApp(QWidget):
         # Apply styles
         self.apply_styles()
 
+        # Load the spaCy model once the window is up instead of blocking startup
+        QTimer.singleShot(0, self.model_service.load_in_background)
+
+    def closeEvent(self, event):
+        # Let running jobs return before their QThread objects are destroyed
+        if self.corpus_watcher is not None:
+            self.corpus_watcher.stop()
+        self.job_scheduler.shutdown()
+        # The startup model load isn't a job; spacy.load can't be interrupted, so wait for it
+        if self.model_service.load_thread is not None:
+            self.model_service.load_thread.wait()
+        self.editor_tab.saveChanges()  # Edits still waiting for the save timer
+        super().closeEvent(event)
+
     def apply_styles(self):
         # Set the application style
         QApplication.setStyle(QStyleFactory.create('Fusion'))
@@ -201,7 +430,7 @@ class DocumentReaderApp(QWidget):
             }
 
             /* Table */
-            QTableWidget {
+            QTableWidget, QTableView {
                 background-color: white;
                 font: """ + font.toString() + """;
             }
@@ -213,6 +442,7 @@ class DocumentReaderApp(QWidget):
 
         # Tab widget
         tab_widget = QTabWidget()
+        self.tab_widget = tab_widget
 
         # Tab 1
         tab1 = QWidget()
@@ -225,6 +455,12 @@ class DocumentReaderApp(QWidget):
         self.select_directory_button.clicked.connect(self.select_directory)
         sidebar_layout.addWidget(self.select_directory_button)
 
+        # New, changed and deleted files are picked up without reloading the directory
+        self.watch_checkbox = QCheckBox('Watch for Changes')
+        self.watch_checkbox.setChecked(True)
+        self.watch_checkbox.toggled.connect(self.set_corpus_watching)
+        sidebar_layout.addWidget(self.watch_checkbox)
+
         self.document_list_widget = QListWidget()
         self.document_list_widget.itemClicked.connect(self.show_document)
         sidebar_layout.addWidget(self.document_list_widget)
@@ -254,8 +490,9 @@ class DocumentReaderApp(QWidget):
         self.result_label = QLabel('')
         content_layout.addWidget(self.result_label)
 
-        self.document_viewer = QTextEdit()
-        self.document_viewer.setStyleSheet(
+        # Loads pages while they are scrolled to instead of the whole document at once
+        self.document_viewer = PagedDocumentViewer()
+        self.document_viewer.text_view.setStyleSheet(
             "font-size: 14pt; line-height: 1.5; font-family: 'Times New Roman', monospace;")  # Set font size to 12pt, line height to 1.5, and use a monospaced font
         content_layout.addWidget(self.document_viewer)
 
@@ -296,6 +533,14 @@ class DocumentReaderApp(QWidget):
         self.export_button = QPushButton('Export Results')
         self.export_button.clicked.connect(self.export_ner_results)
         export_button_layout.addWidget(self.export_button)
+
+        # Entities mentioned together in the same document or passage, drawn on the Network Map
+        self.cooccurrence_mode_combo = QComboBox()
+        self.cooccurrence_mode_combo.addItems([COOCCURRENCE_PASSAGE, COOCCURRENCE_DOCUMENT])
+        export_button_layout.addWidget(self.cooccurrence_mode_combo)
+        self.cooccurrence_button = QPushButton('Co-occurrence Network')
+        self.cooccurrence_button.clicked.connect(self.build_cooccurrence_network)
+        export_button_layout.addWidget(self.cooccurrence_button)
         tab2_layout.addLayout(export_button_layout)
 
         tab2.setLayout(tab2_layout)
@@ -318,19 +563,43 @@ class DocumentReaderApp(QWidget):
         self.regex_input.setStyleSheet("font-size: 14pt; line-height: 1.5; font-family: 'Calibri', monospace;")
         regex_controls_layout.addWidget(self.regex_input)
 
+        # Unchecked: literal terms (one per line for watchlists); checked: one regular expression
+        self.regex_mode_checkbox = QCheckBox('Regex Mode')
+        regex_controls_layout.addWidget(self.regex_mode_checkbox)
+
+        # Button to load a watchlist with one term per line
+        self.load_terms_button = QPushButton('Load Terms')
+        self.load_terms_button.clicked.connect(self.load_search_terms)
+        regex_controls_layout.addWidget(self.load_terms_button)
+
         self.regex_search_button = QPushButton('Regex Search')
         self.regex_search_button.clicked.connect(self.regex_search_documents)
         regex_controls_layout.addWidget(self.regex_search_button)
 
+        self.regex_cancel_button = QPushButton('Cancel')
+        self.regex_cancel_button.setEnabled(False)
+        self.regex_cancel_button.clicked.connect(self.cancel_regex_search)
+        regex_controls_layout.addWidget(self.regex_cancel_button)
+
         tab3_layout.addLayout(regex_controls_layout)
 
+        self.regex_status_label = QLabel('')
+        tab3_layout.addWidget(self.regex_status_label)
+
         # Table to display regex search results
-        self.regex_result_table = QTableWidget()
-        self.regex_result_table.setColumnCount(3)  # Two columns: Document Name and Matched Snippet
-        self.regex_result_table.setHorizontalHeaderLabels(['Document Name', 'Matched Snippet', 'Match Count'])
-        self.regex_result_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        # Backed by a model that keeps only the best `limit` results; the view only draws visible rows
+        self.regex_result_model = SearchResultsModel()
+        self.regex_result_table = QTableView()
+        self.regex_result_table.setModel(self.regex_result_model)
+        self.regex_result_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.regex_result_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # No per-row height measuring
         tab3_layout.addWidget(self.regex_result_table)
 
+        # Streamed results are pushed to the table a few times per second rather than per document
+        self.regex_refresh_timer = QTimer(self)
+        self.regex_refresh_timer.setInterval(250)
+        self.regex_refresh_timer.timeout.connect(self.regex_result_model.refresh)
+
         tab3.setLayout(tab3_layout)
 
 
@@ -340,16 +609,16 @@ class DocumentReaderApp(QWidget):
         tab_widget.addTab(tab3, "Regex Search")
 
         # Create an instance of NetworkMapTab and add it to the tab widget
-        network_map_tab = NetworkMapTab()
-        tab_widget.addTab(network_map_tab, "Network Map")
+        self.network_map_tab = NetworkMapTab()
+        tab_widget.addTab(self.network_map_tab, "Network Map")
 
         # Create an instance of Reader Tab and add it to the tab widget
-        Reader_tab = ReaderTab()
+        Reader_tab = ReaderTab(self.model_service, self.job_scheduler)
         tab_widget.addTab(Reader_tab, "Reader")
 
         # Create an instance of Editor Tab and add it to the tab widget
-        Editor_tab = EditorTab()
-        tab_widget.addTab(Editor_tab, "CSV Editor")
+        self.editor_tab = EditorTab()
+        tab_widget.addTab(self.editor_tab, "CSV Editor")
 
 
         main_layout.addWidget(tab_widget)
@@ -366,65 +635,101 @@ class DocumentReaderApp(QWidget):
 
     def regex_search_documents(self):
         if not self.directory_path:
-            self.result_label.setText('Please select a directory first.')
+            self.regex_status_label.setText('Please select a directory first.')
             return
 
-        pattern = self.regex_input.toPlainText().strip()
+        query = self.regex_input.toPlainText().strip()
 
-        if not pattern:
-            self.result_label.setText('Please enter a regex pattern.')
+        if not query:
+            self.regex_status_label.setText('Please enter a regex pattern.')
             return
 
-        if hasattr(self, 'regex_search_thread') and self.regex_search_thread.isRunning():
-            self.result_label.setText('Regex search is already in progress.')
+        # Compile once for the whole corpus
+        mode = SEARCH_MODE_REGEX if self.regex_mode_checkbox.isChecked() else SEARCH_MODE_TERMS
+        try:
+            pattern = compile_search_pattern(query, mode)
+        except re.error as e:
+            self.regex_status_label.setText(f'Invalid regular expression: {e}')
+            return
+        self.regex_status_label.setText('')
+
+        # Pressing Search again with the same query keeps the search that is already running;
+        # a different query replaces it
+        search_thread = RegexSearchThread(self.document_list, pattern, self.snippet_size, self.context_size)
+        search_thread.results_found.connect(self.display_regex_results)
+        search_thread.progress.connect(self.show_regex_progress)
+        search_thread.finished.connect(self.enable_regex_search_button)
+
+        key = ('regex', self.directory_path, query, mode, self.snippet_size, self.context_size, self.limit)
+        if self.job_scheduler.submit(search_thread, key, PRIORITY_INTERACTIVE) is not search_thread:
             return
+        self.job_scheduler.cancel(self.regex_search_thread)
+        self.regex_search_thread = search_thread
 
-        # Change the color and disable the regex search button
+        # Change the color of the regex search button while the search runs
         self.regex_search_button.setStyleSheet("background-color: #A9A9A9; color: white;")
-        self.regex_search_button.setEnabled(False)
+        self.regex_cancel_button.setEnabled(True)
+
+        self.regex_result_model.clear(self.limit)
+        self.regex_search_started = time.monotonic()
+        self.regex_search_cancelled = False
+        self.regex_refresh_timer.start()
+
+    def cancel_regex_search(self):
+        # The thread checks for this between pages and stops on its own
+        if self.regex_search_thread is not None and self.regex_search_thread.isRunning():
+            self.regex_search_cancelled = True
+            self.job_scheduler.cancel(self.regex_search_thread)
+            self.regex_cancel_button.setEnabled(False)
+
+    def load_search_terms(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Load Search Terms", "", "Text Files (*.txt);;All Files (*)")
+
+        if file_name:
+            try:
+                terms = load_terms_file(file_name)
+            except (OSError, UnicodeDecodeError) as e:
+                self.regex_status_label.setText(f'Could not load terms: {e}')
+                return
 
-        self.regex_search_thread = RegexSearchThread(self.document_list, pattern, self.chunk_size, self.overlap_size)
-        self.regex_search_thread.search_complete.connect(self.display_regex_results)
-        self.regex_search_thread.finished.connect(self.enable_regex_search_button)
-        self.regex_search_thread.start()
+            # Watchlists are literal terms, one per line
+            self.regex_mode_checkbox.setChecked(False)
+            self.regex_input.setPlainText('\n'.join(terms))
+            self.regex_status_label.setText(f'{len(terms)} search terms loaded.')
 
     def enable_regex_search_button(self):
-        # Restore the original color and enable the regex search button when the search is complete
+        # Signals from a search that has been replaced by a newer one are ignored
+        if self.sender() is not self.regex_search_thread:
+            return
+
+        # Restore the original color of the regex search button when the search is complete
         self.regex_search_button.setStyleSheet("")
-        self.regex_search_button.setEnabled(True)
+        self.regex_cancel_button.setEnabled(False)
 
+        self.regex_refresh_timer.stop()
+        self.regex_result_model.refresh()
 
-    def display_regex_results(self, result):
-        self.regex_result_table.setRowCount(0)
+        status = 'Search cancelled' if self.regex_search_cancelled else 'Search finished'
+        self.regex_status_label.setText(f'{status}: {self.regex_result_model.total_results} results found, '
+                                        f'showing {self.regex_result_model.rowCount()}.')
 
-        # Count the number of matching search terms for each result
-        results_with_count = []
-        for document_path, matches in result.items():
-            for match in matches:
-                search_text = self.regex_input.toPlainText().strip()
-                if search_text:
-                    search_terms = [term.strip().lower() for term in search_text.split(' ')]
+    def show_regex_progress(self, done, total, hits):
+        if self.sender() is not self.regex_search_thread:
+            return
 
-                    # Count the number of matching search terms in the snippet
-                    match_count = sum(term in match['snippet'].lower() for term in search_terms)
-                    results_with_count.append({
-                        'document_path': document_path,
-                        'snippet': match['snippet'],
-                        'match_count': match_count
-                    })
+        elapsed = max(time.monotonic() - self.regex_search_started, 0.001)
+        self.regex_status_label.setText(f'Searched {done}/{total} documents, {hits} results, '
+                                        f'{done / elapsed:.1f} documents/s')
 
-        # Sort the results based on the number of matching search terms
-        results_with_count.sort(key=lambda x: x['match_count'], reverse=True)
 
-        # Display the sorted results in the table, up to the maximum of 5000 rows
-        for result_entry in results_with_count[:self.limit]:
-            row_position = self.regex_result_table.rowCount()
-            self.regex_result_table.insertRow(row_position)
-            self.regex_result_table.setItem(row_position, 0, QTableWidgetItem(os.path.basename(result_entry['document_path'])))
-            self.regex_result_table.setItem(row_position, 1, QTableWidgetItem(result_entry['snippet'].replace('\n', ' ')))
+    def display_regex_results(self, document_path, results):
+        if self.sender() is not self.regex_search_thread:
+            return
 
-            # Add a new column to display the number of matches
-            self.regex_result_table.setItem(row_position, 2, QTableWidgetItem(str(result_entry['match_count'])))
+        # The model keeps the results with the most distinct search terms in their snippet,
+        # up to the result limit; the refresh timer puts them on screen
+        for page, snippet, match_count in results:
+            self.regex_result_model.add_result(document_path, page, snippet, match_count)
 
     def open_settings_dialog(self):
         dialog = QDialog(self)
@@ -432,30 +737,51 @@ class DocumentReaderApp(QWidget):
 
         layout = QVBoxLayout()
 
-        chunk_label = QLabel('Chunk Size:')
+        chunk_label = QLabel('Snippet Size:')
         chunk_spinbox = QSpinBox()
-        chunk_spinbox.setValue(self.chunk_size)
         chunk_spinbox.setMinimum(20)
         chunk_spinbox.setMaximum(1500)
-        chunk_spinbox.valueChanged.connect(lambda value: setattr(self, 'chunk_size', value))
+        chunk_spinbox.setValue(self.snippet_size)
+        chunk_spinbox.valueChanged.connect(lambda value: setattr(self, 'snippet_size', value))
 
-        overlap_label = QLabel('Overlap Size:')
+        overlap_label = QLabel('Context Before Match:')
         overlap_spinbox = QSpinBox()
-        overlap_spinbox.setValue(self.overlap_size)
         overlap_spinbox.setMinimum(0)
-        overlap_spinbox.setMaximum(self.chunk_size - 1)
-        overlap_spinbox.valueChanged.connect(lambda value: setattr(self, 'overlap_size', value))
+        overlap_spinbox.setMaximum(self.snippet_size - 1)
+        overlap_spinbox.setValue(self.context_size)
+        overlap_spinbox.valueChanged.connect(lambda value: setattr(self, 'context_size', value))
 
         limit_label = QLabel('Result Limit:')
         limit_spinbox = QSpinBox()
         limit_spinbox.setValue(self.limit)
         limit_spinbox.setMinimum(1)
-        limit_spinbox.setMaximum(999999)  # Adjust the maximum limit as needed
+        limit_spinbox.setMaximum(MAX_RESULT_LIMIT)
         limit_spinbox.valueChanged.connect(lambda value: setattr(self, 'limit', value))
 
         # Set the initial value of the spinbox based on the current limit
         limit_spinbox.setValue(self.limit)
 
+        workers_label = QLabel('Extraction Processes:')
+        workers_spinbox = QSpinBox()
+        workers_spinbox.setMinimum(1)
+        workers_spinbox.setMaximum(64)
+        workers_spinbox.setValue(self.extraction_workers)
+        workers_spinbox.valueChanged.connect(lambda value: setattr(self, 'extraction_workers', value))
+
+        batch_label = QLabel('NER Batch Size:')
+        batch_spinbox = QSpinBox()
+        batch_spinbox.setMinimum(1)
+        batch_spinbox.setMaximum(1000)
+        batch_spinbox.setValue(self.ner_batch_size)
+        batch_spinbox.valueChanged.connect(lambda value: setattr(self, 'ner_batch_size', value))
+
+        ner_processes_label = QLabel('NER Processes:')
+        ner_processes_spinbox = QSpinBox()
+        ner_processes_spinbox.setMinimum(1)
+        ner_processes_spinbox.setMaximum(64)
+        ner_processes_spinbox.setValue(self.ner_processes)
+        ner_processes_spinbox.valueChanged.connect(lambda value: setattr(self, 'ner_processes', value))
+
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         button_box.accepted.connect(dialog.accept)
         button_box.rejected.connect(dialog.reject)
@@ -466,6 +792,12 @@ class DocumentReaderApp(QWidget):
         layout.addWidget(overlap_spinbox)
         layout.addWidget(limit_label)
         layout.addWidget(limit_spinbox)
+        layout.addWidget(workers_label)
+        layout.addWidget(workers_spinbox)
+        layout.addWidget(batch_label)
+        layout.addWidget(batch_spinbox)
+        layout.addWidget(ner_processes_label)
+        layout.addWidget(ner_processes_spinbox)
         layout.addWidget(button_box)
 
         dialog.setLayout(layout)
@@ -484,25 +816,34 @@ class DocumentReaderApp(QWidget):
     # Tab 2
 
     def extract_entities(self, label):
-        self.result_table.setRowCount(0)
+        analysis_thread = NerAnalysisThread(self.document_list, label, self.model_service,
+                                            self.extraction_workers, self.ner_batch_size, self.ner_processes)
+        analysis_thread.analysis_complete.connect(self.display_entities)
 
-        # If the current thread is running, terminate it
-        if hasattr(self, 'ner_analysis_thread') and self.ner_analysis_thread.isRunning():
-            self.ner_analysis_thread.terminate()
-            self.ner_analysis_thread.wait()
+        # Clicking the label that is already being analyzed keeps the running analysis
+        key = ('ner', self.directory_path, label)
+        if self.job_scheduler.submit(analysis_thread, key, PRIORITY_INTERACTIVE) is not analysis_thread:
+            return
 
-        self.ner_analysis_thread = NerAnalysisThread(self.document_list, label)
-        self.ner_analysis_thread.analysis_complete.connect(self.display_entities)
-        self.ner_analysis_thread.start()
+        # The previous analysis stops on its own after its current batch; its results are ignored
+        self.job_scheduler.cancel(self.ner_analysis_thread)
+        self.ner_analysis_thread = analysis_thread
+        self.result_table.setRowCount(0)
 
     def display_entities(self, result):
+        # Ignore results from an analysis that has been replaced by a newer one
+        if self.sender() is not self.ner_analysis_thread:
+            return
+
         document_entities = {}
         for document_path, entities in result.items():
             document_entities[document_path] = entities
 
             row_position = self.result_table.rowCount()
             self.result_table.insertRow(row_position)
-            self.result_table.setItem(row_position, 0, QTableWidgetItem(os.path.basename(document_path)))
+            name_item = QTableWidgetItem(os.path.basename(document_path))
+            name_item.setData(Qt.UserRole, document_path)
+            self.result_table.setItem(row_position, 0, name_item)
 
             # Join entities and replace newline characters with a space
             entities_str = ', '.join(entities).replace('\n', ' ')
@@ -511,6 +852,31 @@ class DocumentReaderApp(QWidget):
             # Use self.label instead of self.ner_label
             self.result_table.horizontalHeaderItem(1).setText(self.ner_analysis_thread.label)
 
+    def build_cooccurrence_network(self):
+        # Built from the documents listed in the NER results, for their label
+        if self.ner_analysis_thread is None or not self.ner_analysis_thread.document_hashes:
+            return
+        document_hashes = self.ner_analysis_thread.document_hashes
+        doc_hashes = sorted(set(document_hashes[self.result_table.item(row, 0).data(Qt.UserRole)]
+                                for row in range(self.result_table.rowCount())))
+        label = self.ner_analysis_thread.label
+        mode = self.cooccurrence_mode_combo.currentText()
+
+        cooccurrence_thread = CooccurrenceThread(doc_hashes, label, mode)
+        cooccurrence_thread.graph_ready.connect(self.show_cooccurrence_network)
+        key = ('cooccurrence', tuple(doc_hashes), label, mode)
+        if self.job_scheduler.submit(cooccurrence_thread, key, PRIORITY_INTERACTIVE) is not cooccurrence_thread:
+            return
+        self.job_scheduler.cancel(self.cooccurrence_thread)
+        self.cooccurrence_thread = cooccurrence_thread
+
+    def show_cooccurrence_network(self, graph):
+        if self.sender() is not self.cooccurrence_thread:
+            return
+        thread = self.cooccurrence_thread
+        self.network_map_tab.showGraph(graph, ('cooccurrence', thread.label, thread.mode))
+        self.tab_widget.setCurrentWidget(self.network_map_tab)
+
 
     # Function to export NER results
     def export_ner_results(self):
@@ -548,126 +914,202 @@ class DocumentReaderApp(QWidget):
 
     def load_documents(self):
         self.document_list_widget.clear()
-        self.document_list = []
 
-        for root, dirs, files in os.walk(self.directory_path):
-            for file in files:
-                if file.lower().endswith('.txt'):
-                    self.document_list.append(os.path.join(root, file))
-                    self.document_list_widget.addItem(file)
-                elif file.lower().endswith('.docx'):
-                    self.document_list.append(os.path.join(root, file))
-                    self.document_list_widget.addItem(file)
-                elif file.lower().endswith('.pdf'):
-                    self.document_list.append(os.path.join(root, file))
-                    self.document_list_widget.addItem(file)
+        if self.corpus_watcher is not None:
+            self.corpus_watcher.stop()
+            self.corpus_watcher.deleteLater()
+        self.pending_documents = set()
+        self.pending_removals = set()
+
+        self.corpus_watcher = CorpusWatcher(self.directory_path, self.job_scheduler, self)
+        self.corpus_watcher.corpus_changed.connect(self.update_corpus)
+        self.document_list = self.corpus_watcher.scan()
+        self.corpus_watcher.set_watching(self.watch_checkbox.isChecked())
+
+        self.populate_sidebar(self.document_list)
+        self.start_extraction()
+
+    def set_corpus_watching(self, enabled):
+        if self.corpus_watcher is not None:
+            self.corpus_watcher.set_watching(enabled)
+
+    def update_corpus(self, added, changed, removed):
+        # document_list is replaced rather than modified, running jobs keep the list they were given
+        removed_set = set(removed)
+        self.document_list = [path for path in self.document_list if path not in removed_set] + added
+
+        for document_path in removed:
+            text_cache.invalidate(document_path)
+
+        self.pending_documents.difference_update(removed)
+        self.pending_documents.update(added)
+        self.pending_documents.update(changed)
+        self.pending_removals.difference_update(added)
+        self.pending_removals.update(removed)
+
+        self.refresh_sidebar()
+        self.start_corpus_update()
+
+    def start_corpus_update(self):
+        # Only the files that changed are extracted and indexed; changes that arrive while
+        # the index is being built are handled once it is done
+        if not self.pending_documents and not self.pending_removals:
+            return
+        for job in (self.extraction_thread, self.index_build_thread):
+            if job is not None and not job.isFinished():
+                return
+
+        documents = [path for path in self.document_list if path in self.pending_documents]
+        removed = list(self.pending_removals)
+        self.pending_documents = set()
+        self.pending_removals = set()
+        self.start_extraction(documents, removed)
+
+    def start_extraction(self, documents=None, removed_documents=None):
+        # Without arguments the whole directory is extracted and indexed; otherwise only
+        # the given documents are (re)processed and removed_documents leave the index
+        if documents is None:
+            # Stop the warm-up and indexing that may still be running for the previously
+            # selected directory; they return after their current document
+            self.job_scheduler.cancel(self.extraction_thread)
+            self.job_scheduler.cancel(self.index_load_thread)
+            self.job_scheduler.cancel(self.index_build_thread)
+            self.search_index = SearchIndex(self.directory_path)
+            key = ('extract', self.directory_path)
+
+            # The index saved by an earlier session answers searches right away, without
+            # waiting for the warm-up
+            self.index_load_thread = IndexLoadThread(self.search_index)
+            self.index_load_thread.finished.connect(self.index_loaded)
+            self.job_scheduler.submit(self.index_load_thread, None, PRIORITY_INTERACTIVE)
+        else:
+            key = None
 
-    def search_documents(self):
-        if not self.directory_path:
-            self.result_label.setText('Please select a directory first.')
+        self.extraction_thread = DocumentExtractionThread(
+            self.document_list if documents is None else documents, self.extraction_workers)
+        self.extraction_thread.extraction_failed.connect(
+            lambda document_path, error: print(f"Error reading file {document_path}: {error}"))
+        self.extraction_thread.progress.connect(self.show_extraction_progress)
+        self.extraction_thread.finished.connect(self.start_indexing)
+        self.removed_documents = removed_documents
+
+        self.job_scheduler.submit(self.extraction_thread, key, PRIORITY_BACKGROUND)
+
+    def start_indexing(self):
+        # Build the search index once the text cache is warm
+        if self.sender() is not self.extraction_thread or self.extraction_thread.is_cancelled():
             return
 
-        search_text = self.search_input.toPlainText().strip()
+        self.index_build_thread = IndexBuildThread(self.search_index, self.extraction_thread.document_list,
+                                                   self.removed_documents)
+        self.index_build_thread.progress.connect(self.show_indexing_progress)
+        self.index_build_thread.finished.connect(self.start_corpus_update)
+        key = ('index', self.directory_path) if self.removed_documents is None else None
+        self.job_scheduler.submit(self.index_build_thread, key, PRIORITY_BACKGROUND)
 
-        if not search_text:
-            # If no search query is entered, reload all documents into the sidebar
-            self.load_documents()
+    def index_loaded(self):
+        # A filter typed while the index was loading was answered by reading documents
+        if self.sender() is self.index_load_thread and self.search_input.toPlainText().strip():
+            self.refresh_sidebar()
+
+    def show_extraction_progress(self, done, total):
+        if self.sender() is not self.extraction_thread:
             return
 
-        search_terms = [term.strip() for term in search_text.split(' ')]
-        self.update_sidebar(search_terms)
+        if done < total:
+            self.result_label.setText(f'Extracting documents: {done}/{total}')
+        else:
+            self.result_label.setText(f'{total} documents ready.')
 
-        # Clear the document viewer when search is performed
-        self.document_viewer.clear()
+    def show_indexing_progress(self, done, total):
+        if self.sender() is not self.index_build_thread:
+            return
+
+        if done < total:
+            self.result_label.setText(f'Indexing documents: {done}/{total}')
+        else:
+            self.result_label.setText(f'{total} documents indexed.')
+
+    def populate_sidebar(self, document_paths):
+        # A filter still reading unindexed documents no longer applies to the new list
+        self.job_scheduler.cancel(self.sidebar_filter_thread)
+        self.sidebar_filter_thread = None
 
-    def update_sidebar(self, search_terms):
         self.document_list_widget.clear()
+        for document_path in document_paths:
+            self.add_sidebar_item(document_path)
 
-        for document_path in self.document_list:
-            try:
-                if document_path.lower().endswith('.txt'):
-                    with open(document_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                elif document_path.lower().endswith('.docx'):
-                    doc = docx.Document(document_path)
-                    content = ' '.join([paragraph.text for paragraph in doc.paragraphs])
-                elif document_path.lower().endswith('.pdf'):
-                    with fitz.open(document_path) as pdf_document:
-                        content = ''
-                        for page_number in range(pdf_document.page_count):
-                            page = pdf_document[page_number]
-                            content += page.get_text()
-
-                # Check if all search terms are present in the content
-                if all(term.lower() in content.lower() for term in search_terms):
-                    self.document_list_widget.addItem(os.path.basename(document_path))
-            except Exception as e:
-                print(f"Error reading file {document_path}: {e}")
+    def add_sidebar_item(self, document_path):
+        # Items keep the full path, two folders may hold files with the same name
+        item = QListWidgetItem(os.path.basename(document_path))
+        item.setData(Qt.UserRole, document_path)
+        item.setToolTip(document_path)
+        self.document_list_widget.addItem(item)
 
-    def show_document(self, item):
-        document_name = item.text()
-        document_path = None
+    def search_documents(self):
+        if not self.directory_path:
+            self.result_label.setText('Please select a directory first.')
+            return
 
-        for path in self.document_list:
-            if os.path.basename(path) == document_name:
-                document_path = path
-                break
+        search_text = self.search_input.toPlainText().strip()
 
-        if document_path is not None:
-            try:
-                if document_path.lower().endswith('.txt'):
-                    with open(document_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                elif document_path.lower().endswith('.docx'):
-                    doc = docx.Document(document_path)
-                    content = ' '.join([paragraph.text for paragraph in doc.paragraphs])
-                elif document_path.lower().endswith('.pdf'):
-                    with fitz.open(document_path) as pdf_document:
-                        content = ''
-                        for page_number in range(pdf_document.page_count):
-                            page = pdf_document[page_number]
-                            content += page.get_text()
-
-                self.document_viewer.setPlainText(content)
-
-                # Highlight search terms
-                self.highlight_search_terms(content)
+        self.refresh_sidebar()
 
-            except Exception as e:
-                print(f"Error reading file {document_path}: {e}")
+        # Clear the document viewer when search is performed
+        if search_text:
+            self.document_viewer.clear()
 
-    def highlight_search_terms(self, content):
-        cursor = self.document_viewer.textCursor()
+    def refresh_sidebar(self):
+        search_text = self.search_input.toPlainText().strip()
 
-        # Clear any previous formatting
-        cursor.clearSelection()
-        char_format = QTextCharFormat()
-        char_format.setBackground(QColor("white"))  # Set a default background color (e.g., white)
+        if not search_text:
+            # If no search query is entered, show all documents in the sidebar
+            self.populate_sidebar(self.document_list)
+            return
 
-        cursor.setCharFormat(char_format)
+        search_terms = [term.strip() for term in search_text.split(' ')]
+        self.update_sidebar(search_terms)
 
-        search_text = self.search_input.toPlainText().strip()
-        if search_text:
-            search_terms = [term.strip() for term in search_text.split(' ')]
+    def update_sidebar(self, search_terms):
+        # Answer from the inverted index; documents it hasn't indexed yet (while it is first
+        # built) are read in the background and added to the list as they match
+        if self.search_index is not None:
+            matches, unindexed = self.search_index.search(search_terms, self.document_list)
+        else:
+            matches, unindexed = [], self.document_list
+        self.populate_sidebar(matches)
 
-            for term in search_terms:
-                cursor = self.document_viewer.textCursor()
-                cursor.beginEditBlock()
+        if unindexed:
+            self.sidebar_filter_thread = SidebarFilterThread(unindexed, search_terms)
+            self.sidebar_filter_thread.document_matched.connect(self.add_sidebar_document)
+            self.job_scheduler.submit(self.sidebar_filter_thread, None, PRIORITY_INTERACTIVE)
 
-                # Find all occurrences of the search term in the content (case-insensitive)
-                pos = content.casefold().find(term.casefold(), 0)
-                while pos != -1:
-                    cursor.setPosition(pos)
-                    cursor.movePosition(QTextCursor.EndOfWord, QTextCursor.KeepAnchor)
-                    char_format.setBackground(QColor("yellow"))  # Highlight background color
-                    cursor.setCharFormat(char_format)
+    def add_sidebar_document(self, document_path):
+        if self.sender() is not self.sidebar_filter_thread:
+            return
+        self.add_sidebar_item(document_path)
 
-                    pos = content.casefold().find(term.casefold(), pos + 1)
+    def show_document(self, item):
+        document_path = item.data(Qt.UserRole)
+
+        # Search terms are highlighted on every page the viewer loads
+        search_text = self.search_input.toPlainText().strip()
+        self.document_viewer.highlighter.set_search_terms([term.strip() for term in search_text.split(' ')])
 
-                cursor.endEditBlock()
+        try:
+            self.document_viewer.open_document(document_path)
+        except Exception as e:
+            self.document_viewer.clear()
+            print(f"Error reading file {document_path}: {e}")
 
 
 if __name__ == '__main__':
+    # Needed by the extraction process pool in PyInstaller builds
+    multiprocessing.freeze_support()
+    # nlp.pipe starts its NER processes with the default start method, which is fork on
+    # Linux; forking a process that is running Qt threads is unsafe
+    multiprocessing.set_start_method('spawn')
+
     app = QApplication([])
     window = DocumentReaderApp()
     app.exec_()
\ No newline at end of file
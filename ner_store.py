@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import threading
+
+from document_extraction import DEFAULT_CACHE_DIR
+from nlp_model import MODEL_NAME
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), 'ner_store.sqlite3')
+
+# Documents per query when reading the mentions of many documents
+MENTION_QUERY_BATCH = 500
+
+# Buttons that combine several spaCy labels
+LABEL_GROUPS = {
+    'SUBJECT': ['PERSON', 'ORG'],
+    'PLACE': ['GPE', 'LOC'],
+}
+
+# Colour of each spaCy label in the Reader tab highlights and the co-occurrence network,
+# so SUBJECT tells people from organizations
+LABEL_COLORS = {
+    'PERSON': '#FFF176',
+    'ORG': '#FFCC80',
+    'GPE': '#A5D6A7',
+    'LOC': '#80CBC4',
+    'NORP': '#CE93D8',
+    'FAC': '#B0BEC5',
+    'PRODUCT': '#90CAF9',
+    'DATE': '#F48FB1',
+    'LAW': '#BCAAA4',
+    'QUANTITY': '#E6EE9C',
+}
+DEFAULT_COLOR = 'yellow'
+
+
+def labels_for(label):
+    return LABEL_GROUPS.get(label, [label])
+
+
+class NerStore:
+    def __init__(self, db_path=DEFAULT_STORE_PATH, model_name=MODEL_NAME):
+        self.db_path = db_path
+        self.model_name = model_name
+        self.lock = threading.Lock()
+        self.connection = None
+
+    def connect(self):
+        # Opened on first use; shared by all threads and guarded by self.lock
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    PRIMARY KEY (doc_hash, model)
+                );
+                CREATE TABLE IF NOT EXISTS entities (
+                    doc_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    start_char INTEGER NOT NULL,
+                    end_char INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entities_by_document ON entities (doc_hash, model, label);
+            """)
+        return self.connection
+
+    def has_document(self, doc_hash):
+        with self.lock:
+            row = self.connect().execute(
+                'SELECT 1 FROM documents WHERE doc_hash = ? AND model = ?',
+                (doc_hash, self.model_name)).fetchone()
+        return row is not None
+
+    def add_document(self, doc_hash, entities):
+        # entities is an iterable of (label, text, start_char, end_char) covering every label
+        rows = [(doc_hash, self.model_name, label, text, start, end) for label, text, start, end in entities]
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute('DELETE FROM entities WHERE doc_hash = ? AND model = ?',
+                                   (doc_hash, self.model_name))
+                connection.executemany('INSERT INTO entities VALUES (?, ?, ?, ?, ?, ?)', rows)
+                connection.execute('INSERT OR REPLACE INTO documents VALUES (?, ?)', (doc_hash, self.model_name))
+
+    def entity_counts(self, doc_hash, label):
+        # Returns [(entity text, count)] for a button label, most frequent first
+        labels = labels_for(label)
+        placeholders = ', '.join('?' for _ in labels)
+        with self.lock:
+            return self.connect().execute(
+                f'SELECT text, COUNT(*) FROM entities WHERE doc_hash = ? AND model = ? AND label IN ({placeholders}) '
+                f'GROUP BY text ORDER BY COUNT(*) DESC, text',
+                (doc_hash, self.model_name, *labels)).fetchall()
+
+    def entity_mentions(self, doc_hashes, label):
+        # Yields (doc_hash, label, text, start_char) for every mention of a button label in
+        # the given documents, in document order. Queried in batches to stay under
+        # SQLite's limit on parameters
+        labels = labels_for(label)
+        label_placeholders = ', '.join('?' for _ in labels)
+        doc_hashes = list(doc_hashes)
+        for batch_start in range(0, len(doc_hashes), MENTION_QUERY_BATCH):
+            batch = doc_hashes[batch_start:batch_start + MENTION_QUERY_BATCH]
+            hash_placeholders = ', '.join('?' for _ in batch)
+            with self.lock:
+                rows = self.connect().execute(
+                    f'SELECT doc_hash, label, text, start_char FROM entities WHERE model = ? '
+                    f'AND label IN ({label_placeholders}) AND doc_hash IN ({hash_placeholders}) '
+                    f'ORDER BY doc_hash, start_char',
+                    (self.model_name, *labels, *batch)).fetchall()
+            yield from rows
+
+
+# Shared store used by the NER tab
+ner_store = NerStore()
@@ -0,0 +1,54 @@
+from PyQt5.QtCore import QObject, QFile, QIODevice, pyqtSignal, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel
+
+# Connects the vis.js network to the bridge once the page has drawn it. The global
+# `network` is created by pyvis's drawGraph(), which runs before this script
+BRIDGE_SCRIPT = """
+new QWebChannel(qt.webChannelTransport, function (channel) {
+    network.on("doubleClick", function (params) {
+        if (params.nodes.length) {
+            channel.objects.bridge.nodeDoubleClicked(String(params.nodes[0]));
+        }
+    });
+});
+"""
+
+qwebchannel_source = None
+
+
+def qwebchannel_script():
+    # qwebchannel.js ships inside Qt's resources; inlined so the page works from setHtml
+    global qwebchannel_source
+    if qwebchannel_source is None:
+        resource = QFile(':/qtwebchannel/qwebchannel.js')
+        if resource.open(QIODevice.ReadOnly):
+            qwebchannel_source = bytes(resource.readAll()).decode('utf-8')
+            resource.close()
+        else:
+            print("Error loading qwebchannel.js")
+            qwebchannel_source = ''
+    return qwebchannel_source
+
+
+def add_bridge_script(html):
+    # Appends the channel setup to a page saved by pyvis
+    script = f"<script type=\"text/javascript\">{qwebchannel_script()}\n{BRIDGE_SCRIPT}</script>\n"
+    position = html.rfind('</body>')
+    if position == -1:
+        return html + script
+    return html[:position] + script + html[position:]
+
+
+class NetworkBridge(QObject):
+    # Receives events from the network drawn in a QWebEngineView
+    node_double_clicked = pyqtSignal(str)
+
+    def __init__(self, webview, parent=None):
+        super().__init__(parent)
+        self.channel = QWebChannel(self)
+        self.channel.registerObject('bridge', self)
+        webview.page().setWebChannel(self.channel)
+
+    @pyqtSlot(str)
+    def nodeDoubleClicked(self, node_id):
+        self.node_double_clicked.emit(node_id)
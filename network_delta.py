@@ -0,0 +1,63 @@
+import json
+
+from graph_builder import edge_id, edge_options, node_options
+
+# Above this many added, removed or changed nodes and edges the map is drawn again from
+# scratch; a fresh layout looks better than one that was mostly patched in
+DELTA_UPDATE_MAX_CHANGES = 10000
+
+# Nodes or edges per script handed to the page; the map is also drawn this way from an
+# empty page, and one script holding a whole large map is slow to pass over
+DELTA_SCRIPT_BATCH = 2000
+
+
+class GraphDelta:
+    # What changed between the graph on screen and the next one. Changed edges are
+    # removed and added again, changed nodes are updated in place to keep their position
+    def __init__(self, old_graph, new_graph):
+        self.removed_nodes = [node_id for node_id in old_graph.nodes if node_id not in new_graph.nodes]
+        self.added_nodes = []
+        self.changed_nodes = []
+        for node_id in new_graph.nodes:
+            if node_id not in old_graph.nodes:
+                self.added_nodes.append(node_id)
+            elif node_state(old_graph, node_id) != node_state(new_graph, node_id):
+                self.changed_nodes.append(node_id)
+
+        # Plain dict lookups, this runs over every edge of the map on each submit
+        old_edges, new_edges = old_graph.edges, new_graph.edges
+        old_weights, new_weights = old_graph.edge_weights, new_graph.edge_weights
+        self.removed_edges = [key for key, color in old_edges.items()
+                              if new_edges.get(key) != color or new_weights[key] != old_weights[key]]
+        self.added_edges = [key for key, color in new_edges.items()
+                            if old_edges.get(key) != color or old_weights[key] != new_weights[key]]
+
+    def size(self):
+        return (len(self.removed_nodes) + len(self.added_nodes) + len(self.changed_nodes) +
+                len(self.removed_edges) + len(self.added_edges))
+
+
+def node_state(graph, node_id):
+    return graph.nodes[node_id], graph.node_labels.get(node_id), graph.node_titles.get(node_id)
+
+
+def delta_scripts(delta, graph, font_color, directed, layout=None, batch_size=DELTA_SCRIPT_BATCH):
+    # JavaScript applying the delta to the vis.js DataSets pyvis keeps in the globals
+    # `nodes` and `edges`, in scripts of at most batch_size nodes or edges. New nodes get
+    # their position from layout when it is given (static layout); otherwise physics
+    # places them
+    added_nodes = []
+    for node_id in delta.added_nodes:
+        options = node_options(graph, node_id, font_color)
+        if layout is not None and node_id in layout:
+            options['x'], options['y'] = layout[node_id]
+        added_nodes.append(options)
+    changed_nodes = [node_options(graph, node_id, font_color) for node_id in delta.changed_nodes]
+    added_edges = [edge_options(graph, key, directed) for key in delta.added_edges]
+    removed_edges = [edge_id(key) for key in delta.removed_edges]
+
+    # Edges go before the nodes they connect are removed, and after the ones they connect are added
+    for method, items in (('edges.remove', removed_edges), ('nodes.remove', delta.removed_nodes),
+                          ('nodes.update', changed_nodes + added_nodes), ('edges.add', added_edges)):
+        for start in range(0, len(items), batch_size):
+            yield f"{method}({json.dumps(items[start:start + batch_size])});\n"
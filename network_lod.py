@@ -0,0 +1,216 @@
+import math
+from collections import defaultdict
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from graph_builder import NetworkGraph
+from graph_layout import graph_hash
+
+# The renderer is never handed more edges than this
+DEFAULT_EDGE_BUDGET = 5000
+
+# Largest budget offered. Maps are sent to the page in batches, so page size no longer
+# limits it, but vis.js stops being usable to pan and zoom at a few tens of thousands of
+# edges
+MAX_EDGE_BUDGET = 20000
+
+# The best connected nodes are always shown on their own, never inside a community
+DEFAULT_HUB_COUNT = 50
+
+COMMUNITY_COLOR = "gray"
+COMMUNITY_ID_PREFIX = "community:"
+LABEL_PROPAGATION_ROUNDS = 30
+LABEL_UPDATE_SHARE = 0.85
+
+
+def detect_communities(graph, previous=None):
+    # Label propagation: every node repeatedly takes the label most of its neighbours
+    # (by edge weight) have, ties going to the smallest label. Each round is a handful
+    # of NumPy passes over the edges, and only a random share of the nodes is updated
+    # per round so neighbours don't keep swapping labels. previous (an earlier result for
+    # a similar graph) is used as the starting point, so after a small edit only a
+    # round or two is needed. Returns {node id: community number}, numbered from the
+    # largest community down. Propagation only ever spreads labels, so a community that
+    # lost the edges holding it together (or nodes left without edges sharing an old
+    # label) would stay one; every label is split into its connected parts at the end
+    node_ids = list(graph.nodes)
+    node_count = len(node_ids)
+    if node_count == 0:
+        return {}
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    pairs = [(index[source], index[target], weight) for (source, target), weight in graph.edge_weights.items()
+             if source != target]
+    sources = np.fromiter((pair[0] for pair in pairs), dtype=np.int64, count=len(pairs))
+    targets = np.fromiter((pair[1] for pair in pairs), dtype=np.int64, count=len(pairs))
+    weights = np.fromiter((pair[2] for pair in pairs), dtype=np.float64, count=len(pairs))
+    # Both directions: every node hears from all of its neighbours
+    sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources))
+    weights = np.concatenate((weights, weights))
+
+    labels = np.arange(node_count, dtype=np.int64)
+    if previous:
+        # Nodes seen before start in their old community, new nodes on their own
+        known = np.fromiter((previous.get(node_id, -1) for node_id in node_ids), dtype=np.int64, count=node_count)
+        labels = np.where(known >= 0, known, labels + known.max() + 1)
+    rng = np.random.default_rng(0)  # Same graph, same communities
+
+    for _ in range(LABEL_PROPAGATION_ROUNDS):
+        if not len(sources):
+            break
+        # Total weight of every (node, neighbour label) pair, then the best label per node
+        keys, inverse = np.unique(sources * (labels.max() + 1) + labels[targets], return_inverse=True)
+        votes = np.bincount(inverse, weights)
+        voters = keys // (labels.max() + 1)
+        candidates = keys % (labels.max() + 1)
+        order = np.lexsort((candidates, -votes, voters))
+        first = order[np.r_[True, voters[order][1:] != voters[order][:-1]]]
+        best = labels.copy()
+        best[voters[first]] = candidates[first]
+
+        if np.array_equal(best, labels):
+            break
+        update = rng.random(node_count) < LABEL_UPDATE_SHARE
+        labels = np.where(update, best, labels)
+
+    same = labels[sources] == labels[targets]
+    same_label_edges = sparse.csr_matrix((np.ones(int(same.sum())), (sources[same], targets[same])),
+                                         shape=(node_count, node_count))
+    _, labels = csgraph.connected_components(same_label_edges, directed=False)
+
+    uniques, numbers, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    ranks = np.empty(len(uniques), dtype=np.int64)
+    ranks[np.lexsort((uniques, -sizes))] = np.arange(len(uniques))
+    return dict(zip(node_ids, ranks[numbers].tolist()))
+
+
+class LevelOfDetail:
+    # Sits between the graph built from the sheet and the pyvis network: drops weak
+    # nodes and edges, collapses communities into super-nodes and keeps the number of
+    # edges within the budget. Communities the user expanded are shown node by node
+    def __init__(self, edge_budget=DEFAULT_EDGE_BUDGET, hub_count=DEFAULT_HUB_COUNT, min_degree=0, min_weight=1):
+        self.edge_budget = edge_budget
+        self.hub_count = hub_count
+        self.min_degree = min_degree
+        self.min_weight = min_weight
+
+        # Expanded communities are remembered by their best connected node, so they stay
+        # expanded when an edit to the sheet renumbers the communities
+        self.expanded_nodes = set()
+        self.graph_key = None
+        self.communities = {}  # node id -> community number, for the current graph
+        self.members = {}  # super-node id -> member node ids of the last reduced graph
+        self.representatives = {}  # super-node id -> the member it is named after
+
+    def reset(self):
+        self.expanded_nodes = set()
+        self.graph_key = None
+        self.communities = {}
+
+    def toggle(self, node_id):
+        # Double-clicking a super-node expands it, double-clicking a node of an expanded
+        # community collapses it again. Returns False when nothing changes
+        if node_id in self.members:
+            self.expanded_nodes.add(self.representatives[node_id])
+            return True
+        community = self.communities.get(node_id)
+        collapsed = set(expanded_node for expanded_node in self.expanded_nodes
+                        if self.communities.get(expanded_node) == community)
+        if community is not None and collapsed:
+            self.expanded_nodes -= collapsed
+            return True
+        return False
+
+    def filter_graph(self, graph):
+        # Weight and degree thresholds
+        if self.min_degree <= 0 and self.min_weight <= 1:
+            return graph
+        filtered = NetworkGraph()
+        kept = {key: weight for key, weight in graph.edge_weights.items() if weight >= self.min_weight}
+        degrees = defaultdict(int)
+        for (source, target), weight in kept.items():
+            degrees[source] += weight
+            degrees[target] += weight
+
+        for node_id, (color, size) in graph.nodes.items():
+            if degrees[node_id] >= self.min_degree:
+                filtered.add_node(node_id, color, size, graph.node_labels.get(node_id), graph.node_titles.get(node_id))
+        for key, weight in kept.items():
+            if key[0] in filtered.nodes and key[1] in filtered.nodes:
+                filtered.add_edge(key[0], key[1], graph.edges[key], weight)
+        return filtered
+
+    def reduce(self, graph):
+        # Returns the graph to draw. Small graphs come back with full detail
+        key = (graph_hash(graph), self.min_degree, self.min_weight)
+        graph = self.filter_graph(graph)
+        self.members = {}
+        self.representatives = {}
+        if len(graph.edges) <= self.edge_budget:
+            return graph
+
+        if key != self.graph_key:
+            # The sheet changed: start from the communities found last time
+            self.communities = detect_communities(graph, self.communities)
+            self.graph_key = key
+        expanded = set(self.communities[node_id] for node_id in self.expanded_nodes if node_id in self.communities)
+
+        degrees = graph.degrees()
+        hubs = set(sorted(graph.nodes, key=lambda node_id: -degrees[node_id])[:self.hub_count])
+
+        community_sizes = defaultdict(int)
+        for community in self.communities.values():
+            community_sizes[community] += 1
+
+        # Where every node ends up: itself, or the super-node of its community
+        display = {}
+        for node_id in graph.nodes:
+            community = self.communities[node_id]
+            if node_id in hubs or community in expanded or community_sizes[community] == 1:
+                display[node_id] = node_id
+            else:
+                display[node_id] = COMMUNITY_ID_PREFIX + str(community)
+
+        reduced = NetworkGraph()
+        members = defaultdict(list)
+        for node_id, (color, size) in graph.nodes.items():
+            display_id = display[node_id]
+            if display_id == node_id:
+                reduced.add_node(node_id, color, size, graph.node_labels.get(node_id), graph.node_titles.get(node_id))
+            else:
+                members[display_id].append(node_id)
+
+        for super_node_id, member_ids in members.items():
+            # Named after its best connected member, sized by the number of members
+            representative = max(member_ids, key=lambda node_id: degrees[node_id])
+            self.representatives[super_node_id] = representative
+            label = f"{graph.node_labels.get(representative, representative)} +{len(member_ids) - 1}"
+            size = 15 + 5 * math.log2(len(member_ids))
+            reduced.add_node(super_node_id, COMMUNITY_COLOR, size, label,
+                             f"{len(member_ids)} nodes, double-click to expand")
+        self.members = dict(members)
+
+        # Edges between super-nodes add up; the heaviest ones fill the budget
+        edges = defaultdict(int)
+        colors = {}
+        for (source, target), weight in graph.edge_weights.items():
+            source, target = display[source], display[target]
+            if source == target:
+                continue
+            pair = (source, target) if source <= target else (target, source)
+            edges[pair] += weight
+            colors[pair] = graph.edges.get(pair, COMMUNITY_COLOR)
+
+        kept = sorted(edges, key=lambda pair: -edges[pair])[:self.edge_budget]
+        for pair in kept:
+            reduced.add_edge(pair[0], pair[1], colors[pair], edges[pair])
+
+        # Nodes that lost all their edges to the budget are left out, hubs and super-nodes stay
+        connected = set(node_id for pair in kept for node_id in pair)
+        for node_id in list(reduced.nodes):
+            if node_id not in connected and node_id not in hubs and node_id not in self.members:
+                del reduced.nodes[node_id]
+                reduced.node_labels.pop(node_id, None)
+                reduced.node_titles.pop(node_id, None)
+        return reduced
@@ -1,10 +1,23 @@
 import os
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QTableWidget, QSizePolicy, QPushButton, QFileDialog, QTableWidgetItem, QMenu, QAction
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QTableView, QSizePolicy, QPushButton, QFileDialog, QMenu, QAction, QCheckBox, QSpinBox, QFormLayout
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtCore import Qt, QUrl
 from pyvis.network import Network
-import pandas as pd
-import shutil
+
+from graph_builder import NetworkGraph, build_graph, add_graph_to_network
+from graph_layout import compute_layout, apply_static_layout, place_new_nodes, STATIC_LAYOUT_MIN_NODES
+from network_lod import LevelOfDetail, DEFAULT_EDGE_BUDGET, MAX_EDGE_BUDGET, DEFAULT_HUB_COUNT
+from network_bridge import NetworkBridge, add_bridge_script
+from network_delta import GraphDelta, delta_scripts, DELTA_UPDATE_MAX_CHANGES
+from network_table_model import NetworkTableModel
+
+# Source of the graphs built from the spreadsheet, see showGraph
+SHEET_SOURCE = 'sheet'
+
+# Run once a drawn map has been sent to the page. Nodes added to a running network aren't
+# brought into view by themselves; with physics on, the view is fitted again once settled
+FIT_SCRIPT = 'network.fit();\nnetwork.once("stabilized", function () { network.fit(); });\n'
+
 
 class NetworkMapTab(QWidget):
     def __init__(self):
@@ -16,7 +29,8 @@ class NetworkMapTab(QWidget):
         # Left part: Spreadsheet View
         spreadsheet_layout = QVBoxLayout()
         spreadsheet_label = QLabel("Spreadsheet View")
-        self.spreadsheet_view = QTableWidget(self)
+        self.spreadsheet_model = NetworkTableModel(parent=self)
+        self.spreadsheet_view = QTableView(self)
         spreadsheet_layout.addWidget(spreadsheet_label)
         spreadsheet_layout.addWidget(self.spreadsheet_view)
 
@@ -24,6 +38,33 @@ class NetworkMapTab(QWidget):
         self.submit_button = QPushButton("Submit")
         spreadsheet_layout.addWidget(self.submit_button)
 
+        # Positions computed in Python instead of browser physics; always used for large graphs
+        self.static_layout_checkbox = QCheckBox("Static Layout")
+        self.static_layout_checkbox.setToolTip(
+            f"Graphs with {STATIC_LAYOUT_MIN_NODES} or more nodes always use a static layout")
+        spreadsheet_layout.addWidget(self.static_layout_checkbox)
+
+        # Level of detail: graphs with more edges than the budget are drawn with their
+        # communities collapsed into super-nodes, double-click one to expand it
+        self.level_of_detail = LevelOfDetail()
+        detail_layout = QFormLayout()
+        self.edge_budget_spinbox = QSpinBox()
+        self.edge_budget_spinbox.setRange(100, MAX_EDGE_BUDGET)
+        self.edge_budget_spinbox.setSingleStep(1000)
+        self.edge_budget_spinbox.setValue(DEFAULT_EDGE_BUDGET)
+        detail_layout.addRow("Edge Budget:", self.edge_budget_spinbox)
+        self.hub_count_spinbox = QSpinBox()
+        self.hub_count_spinbox.setRange(0, 10000)
+        self.hub_count_spinbox.setValue(DEFAULT_HUB_COUNT)
+        detail_layout.addRow("Top Hubs:", self.hub_count_spinbox)
+        self.min_degree_spinbox = QSpinBox()
+        self.min_degree_spinbox.setRange(0, 100000)
+        detail_layout.addRow("Min Degree:", self.min_degree_spinbox)
+        self.min_weight_spinbox = QSpinBox()
+        self.min_weight_spinbox.setRange(1, 100000)
+        detail_layout.addRow("Min Weight:", self.min_weight_spinbox)
+        spreadsheet_layout.addLayout(detail_layout)
+
         # Add an upload CSV button
         self.upload_button = QPushButton("Upload CSV")
         spreadsheet_layout.addWidget(self.upload_button)
@@ -36,11 +77,32 @@ class NetworkMapTab(QWidget):
         self.visualization_webview = QWebEngineView(self)  # Use QWebEngineView for displaying HTML content
         self.visualization_webview.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         visualization_layout.addWidget(visualization_label)
+        self.map_status_label = QLabel()
+        self.map_status_label.hide()
+        visualization_layout.addWidget(self.map_status_label)
         visualization_layout.addWidget(self.visualization_webview)
         main_layout.addLayout(visualization_layout)
 
         self.setLayout(main_layout)
 
+        # The graph read from the sheet at the last submit, before level of detail, and
+        # where it came from
+        self.graph = None
+        self.graph_source = None
+
+        # The graph on screen, whether it has a static layout and the node positions if
+        # so. Once the page has loaded, later submits only send it what changed
+        self.shown_graph = None
+        self.shown_static = False
+        self.node_positions = None
+        self.page_loaded = False
+        self.loading_pages = 0  # setHtml calls whose loadFinished hasn't arrived yet
+        self.visualization_webview.loadFinished.connect(self.pageLoaded)
+
+        # Double-clicks on the map come back through a web channel
+        self.bridge = NetworkBridge(self.visualization_webview, self)
+        self.bridge.node_double_clicked.connect(self.toggleNode)
+
         # Initialize the spreadsheet view
         self.initSpreadsheetView(self.spreadsheet_view)
 
@@ -68,18 +130,20 @@ class NetworkMapTab(QWidget):
         self.custom_context_menu.exec_(self.visualization_webview.mapToGlobal(pos))
 
     def savePage(self):
+        if self.shown_graph is None:
+            return
         # Ask the user to choose a directory to save the HTML file
         directory = QFileDialog.getExistingDirectory(self, "Select Directory to Save HTML", "")
         if directory:
-            # Copy the existing visualization.html file to the chosen directory
-            source_path = "visualization.html"
+            # Write the map on screen, with its latest changes, to the chosen directory
             destination_path = os.path.join(directory, "network_map.html")
 
             try:
-                shutil.copy(source_path, destination_path)
+                with open(destination_path, "w", encoding="utf-8") as html_file:
+                    html_file.write(self.pageHtml(self.shown_graph))
                 print(f"Page saved successfully: {destination_path}")
             except Exception as e:
-                print(f"Error copying file: {e}")
+                print(f"Error saving page: {e}")
 
     def getHtmlContent(self):
         # Get the current HTML content of the web view
@@ -92,74 +156,105 @@ class NetworkMapTab(QWidget):
         result = data
 
     def initSpreadsheetView(self, spreadsheet_view):
-        # Set the column count and headers
-        column_count = 11  # Set the desired number of columns
-        spreadsheet_view.setColumnCount(column_count)
-        headers = ['Main Node'] + [f'Node {i + 1}' for i in range(column_count - 1)]
-        spreadsheet_view.setHorizontalHeaderLabels(headers)
-
-        # Set the row count (initial)
-        row_count = 2000  # Set the desired number of rows
-        spreadsheet_view.setRowCount(row_count)
+        # The cells live in the model; the view only draws the visible ones
+        spreadsheet_view.setModel(self.spreadsheet_model)
 
         # Enable item changes
-        spreadsheet_view.setEditTriggers(QTableWidget.AllEditTriggers)
+        spreadsheet_view.setEditTriggers(QTableView.AllEditTriggers)
 
     def updateVisualization(self):
-        
-        # Retrieve data from the spreadsheet view
-        main_nodes = set()
-        edges = set()
-        colors = ["blue", "red", "green", "purple", "orange", "brown", "pink", "gray", "cyan", "magenta"]
-
-        for row in range(self.spreadsheet_view.rowCount()):
-            unique_value_item = self.spreadsheet_view.item(row, 0)
-            if unique_value_item:
-                unique_value = unique_value_item.text().strip()
-                if unique_value:
-                    main_nodes.add(unique_value)
-
-                    # Add main node with a unique color
-                    self.net.add_node(unique_value, label=unique_value, color="blue", size=25)
-
-                    # Iterate over child nodes (columns 1 and onward)
-                    for col in range(1, self.spreadsheet_view.columnCount()):
-                        child_node_item = self.spreadsheet_view.item(row, col)
-                        if child_node_item:
-                            child_nodes_text = child_node_item.text().strip()
-                            if child_nodes_text:
-                                # Split child nodes based on comma and add each as a separate node
-                                child_nodes = [node.strip() for node in child_nodes_text.split(",")]
-
-                                # Add child nodes with the same color as the column
-                                color = colors[col % len(colors)]
-                                for child_node in child_nodes:
-                                    self.net.add_node(child_node, label=child_node, color=color, size=15)
-                                    edges.add((unique_value, child_node, color))
-
-        # Add edges, checking if nodes exist
-        for edge in edges:
-            source, target, color = edge[0], edge[1], edge[2]
-            if source not in self.net.get_nodes():
-                self.net.add_node(source, label=source, color="blue", size=25)
-            if target not in self.net.get_nodes():
-                self.net.add_node(target, label=target, color=color, size=15)
-            self.net.add_edge(source, target, color=color)
-
-        # Render to HTML
-        self.net.show_buttons(filter_=['physics'])
-        html_path = "visualization.html"
-        self.net.save_graph(html_path)
-
-        # Display HTML in QWebEngineView
-        with open(html_path, "r", encoding="utf-8") as html_file:
-            html = html_file.read()
-
-        self.visualization_webview.setHtml(html)
+        # Read the sheet once and build the graph with hash-based dedup
+        self.showGraph(build_graph(self.spreadsheet_model.rows()), SHEET_SOURCE)
+
+    def showGraph(self, graph, source=None):
+        # Draw a graph built elsewhere (e.g. entity co-occurrence) instead of the sheet's.
+        # Communities and expanded super-nodes carry over only between graphs of the
+        # same source; no source means an unrelated graph
+        if source is None or source != self.graph_source:
+            self.level_of_detail.reset()
+        self.graph = graph
+        self.graph_source = source
+        self.level_of_detail.edge_budget = self.edge_budget_spinbox.value()
+        self.level_of_detail.hub_count = self.hub_count_spinbox.value()
+        self.level_of_detail.min_degree = self.min_degree_spinbox.value()
+        self.level_of_detail.min_weight = self.min_weight_spinbox.value()
+        self.renderGraph()
+
+    def renderGraph(self):
+        # Show the part of the graph that fits the edge budget
+        graph = self.level_of_detail.reduce(self.graph)
+        static = self.static_layout_checkbox.isChecked() or len(graph.nodes) >= STATIC_LAYOUT_MIN_NODES
+
+        if self.page_loaded and self.shown_graph is not None and static == self.shown_static:
+            delta = GraphDelta(self.shown_graph, graph)
+            if delta.size() <= DELTA_UPDATE_MAX_CHANGES:
+                self.updatePage(graph, delta)
+                return
+
+        # Draw the map from scratch. setHtml passes the page as a data: URL, which
+        # QtWebEngine refuses over 2 MB, so it gets a page with empty DataSets and the
+        # graph follows in batches once that has loaded (pageLoaded)
+        self.shown_graph = graph
+        self.shown_static = static
+        # Nodes are placed at fixed positions with physics off, the map appears at once
+        self.node_positions = compute_layout(graph) if static else None
+        self.page_loaded = False
+        self.loading_pages += 1
+        self.map_status_label.hide()
+        self.visualization_webview.setHtml(self.pageHtml(NetworkGraph()))
+
+    def updatePage(self, graph, delta):
+        # Patch the map on screen in place: everything that didn't change keeps its
+        # position and the physics simulation isn't restarted
+        layout = None
+        if self.shown_static:
+            # New nodes go next to their neighbours, or where the nodes they replace were
+            layout = place_new_nodes(graph, self.node_positions, delta.added_nodes, delta.removed_nodes)
+            self.node_positions = {node_id: layout[node_id] for node_id in graph.nodes}
+
+        self.shown_graph = graph
+        self.sendDelta(delta, graph, layout)
+
+    def sendDelta(self, delta, graph, layout=None):
+        for script in delta_scripts(delta, graph, self.net.font_color, self.net.directed, layout):
+            self.visualization_webview.page().runJavaScript(script)
+
+    def pageHtml(self, graph):
+        # The whole page for a graph, generated in memory; with an empty graph, the page
+        # the map is drawn into
+        self.net = Network(height="1024px", width="100%", bgcolor="#ffffff", font_color="black")
+        add_graph_to_network(graph, self.net)
+        if self.node_positions is not None:
+            apply_static_layout(self.net, self.node_positions)
+        else:
+            self.net.show_buttons(filter_=['physics'])
+        return add_bridge_script(self.net.generate_html())
+
+    def pageLoaded(self, ok):
+        # Only the page asked for last counts; loads it replaced finish too
+        if not self.loading_pages:
+            return
+        self.loading_pages -= 1
+        if self.loading_pages:
+            return
+
+        self.page_loaded = ok
+        if not ok:
+            self.map_status_label.setText("The map could not be loaded, submit to try again.")
+            self.map_status_label.show()
+            return
+
+        self.sendDelta(GraphDelta(NetworkGraph(), self.shown_graph), self.shown_graph, self.node_positions)
+        self.visualization_webview.page().runJavaScript(FIT_SCRIPT)
+
+    def toggleNode(self, node_id):
+        # Expand a super-node, or collapse the community of an expanded node, without
+        # reading the sheet again
+        if self.graph is None or not self.level_of_detail.toggle(node_id):
+            return
+        self.renderGraph()
 
     def submitData(self):
-        # Recreate the Pyvis Network object
-        self.net = Network(height="1024px", width="100%", bgcolor="#ffffff", font_color="black")
         # Call the visualization update method when the submit button is clicked
         self.updateVisualization()
 
@@ -170,38 +265,10 @@ class NetworkMapTab(QWidget):
 
         if filePath:
             # Read CSV and update the table
-            self.df = pd.read_csv(filePath)
-            self.spreadsheet_view.clear()
-            self.initSpreadsheetView(self.spreadsheet_view)
-            self.spreadsheet_view.setRowCount(len(self.df))
-            self.spreadsheet_view.setColumnCount(len(self.df.columns) + 1)
-            for row in range(len(self.df)):
-                # Set main node value in the first column
-                main_node_item = QTableWidgetItem(str(self.df.iloc[row, 0]))
-                self.spreadsheet_view.setItem(row, 0, main_node_item)
-
-                # Set child node values in the next columns
-                for col in range(1, len(self.df.columns)):
-                    child_node_item = QTableWidgetItem(str(self.df.iloc[row, col]))
-                    self.spreadsheet_view.setItem(row, col, child_node_item)
-
-    def showContextMenu(self, pos):
-        # Show the custom context menu at the specified position
-        self.custom_context_menu.exec_(self.visualization_webview.mapToGlobal(pos))
-
-    def savePage(self):
-        # Ask the user to choose a directory to save the HTML file
-        directory = QFileDialog.getExistingDirectory(self, "Select Directory to Save HTML", "")
-        if directory:
-            # Copy the existing visualization.html file to the chosen directory
-            source_path = "visualization.html"
-            destination_path = os.path.join(directory, "network_map.html")
-
             try:
-                shutil.copy(source_path, destination_path)
-                print(f"Page saved successfully: {destination_path}")
+                self.spreadsheet_model.load_csv(filePath)
             except Exception as e:
-                print(f"Error copying file: {e}")
+                print(f"Error reading CSV file: {e}")
 
 
 if __name__ == "__main__":
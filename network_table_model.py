@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Size of the empty sheet the Network Map starts with
+DEFAULT_ROW_COUNT = 2000
+DEFAULT_COLUMN_COUNT = 11
+
+
+def empty_frame(row_count, column_count):
+    return pd.DataFrame(np.full((row_count, column_count), '', dtype=object))
+
+
+class NetworkTableModel(QAbstractTableModel):
+    # The Network Map sheet: a DataFrame of cell strings, '' for empty cells. The view
+    # only asks for the cells it shows, so no item objects are created per cell
+    def __init__(self, row_count=DEFAULT_ROW_COUNT, column_count=DEFAULT_COLUMN_COUNT, parent=None):
+        super().__init__(parent)
+        self.frame = empty_frame(row_count, column_count)
+
+    def set_frame(self, frame):
+        self.beginResetModel()
+        self.frame = frame
+        self.endResetModel()
+
+    def load_csv(self, file_path):
+        # The first column holds the main nodes and the others child nodes. Everything is
+        # read as text in one read_csv call, and one empty column is added for adding more
+        # nodes by hand
+        frame = pd.read_csv(file_path, dtype=object, keep_default_na=False)
+        frame.columns = range(frame.shape[1])
+        frame[frame.shape[1]] = ''
+        self.set_frame(frame)
+
+    def rows(self):
+        # Tuples of cell strings for the graph builder, straight from the DataFrame
+        return self.frame.itertuples(index=False, name=None)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.frame.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.frame.shape[1]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.frame.iat[index.row(), index.column()]
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self.frame.iat[index.row(), index.column()] = str(value)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return 'Main Node' if section == 0 else f'Node {section}'
+        return super().headerData(section, orientation, role)
@@ -0,0 +1,129 @@
+import threading
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+# spaCy model used by the NER and Reader tabs
+MODEL_NAME = 'en_core_web_lg'
+
+
+class ModelLoadThread(QThread):
+    def __init__(self, model_service):
+        super(ModelLoadThread, self).__init__()
+        self.model_service = model_service
+
+    def run(self):
+        try:
+            self.model_service.load()
+        except Exception as e:
+            print(f"Error loading spaCy model {self.model_service.model_name}: {e}")
+
+
+class ModelService(QObject):
+    model_ready = pyqtSignal()
+    model_failed = pyqtSignal(str)
+
+    def __init__(self, model_name=MODEL_NAME):
+        super().__init__()
+        self.model_name = model_name
+        self.nlp = None
+        self.lock = threading.Lock()
+        self.load_thread = None
+
+    def is_ready(self):
+        return self.nlp is not None
+
+    def load_in_background(self):
+        if self.nlp is None and self.load_thread is None:
+            self.load_thread = ModelLoadThread(self)
+            self.load_thread.start()
+
+    def load(self):
+        # Loads the model once and returns it. Callers from other threads block until
+        # the first load has finished instead of loading a second copy
+        with self.lock:
+            if self.nlp is None:
+                # Imported here so that importing spaCy doesn't slow down application startup
+                import spacy
+                try:
+                    self.nlp = spacy.load(self.model_name)
+                except Exception as e:
+                    self.model_failed.emit(str(e))
+                    raise
+                self.model_ready.emit()
+        return self.nlp
+
+
+def ner_disabled_components(nlp):
+    # Names of the pipeline components that entity recognition doesn't need
+    # (tagger, parser, lemmatizer, ...), for nlp.pipe(disable=...)
+    needed = {'ner', 'entity_ruler'}
+
+    # In some pipelines ner reads its features from a shared tok2vec or transformer
+    for name in ('tok2vec', 'transformer'):
+        if name in nlp.pipe_names and 'ner' in getattr(nlp.get_pipe(name), 'listening_components', []):
+            needed.add(name)
+
+    return [name for name in nlp.pipe_names if name not in needed]
+
+
+# Documents longer than this are analyzed in overlapping chunks so that memory is
+# bounded by the chunk size instead of the document size
+NER_CHUNK_SIZE = 100000
+NER_CHUNK_OVERLAP = 200
+
+# Preferred places to cut a chunk, best first: paragraph, sentence, line, word
+CHUNK_BOUNDARIES = [('\n\n',), ('. ', '! ', '? ', '.\n'), ('\n',), (' ',)]
+
+
+def text_boundary(text, lo, hi):
+    # Returns the best cut position in text[lo:hi], or hi if there is none
+    for separators in CHUNK_BOUNDARIES:
+        positions = [text.rfind(separator, lo, hi) + len(separator) for separator in separators
+                     if text.rfind(separator, lo, hi) != -1]
+        if positions:
+            return max(positions)
+    return hi
+
+
+def chunk_spans(text, chunk_size=NER_CHUNK_SIZE, overlap=NER_CHUNK_OVERLAP):
+    # Returns [(start, end, keep_start, keep_end)]. Consecutive chunks overlap by about
+    # `overlap` characters; an entity found in a chunk is only kept when it starts
+    # inside [keep_start, keep_end), which splits every overlap in the middle
+    length = len(text)
+    if length <= chunk_size:
+        return [(0, length, 0, length)]
+
+    overlap = min(overlap, chunk_size // 4)
+    spans = []
+    start = 0
+    while True:
+        end = min(start + chunk_size, length)
+        if end < length:
+            end = text_boundary(text, start + chunk_size // 2, end)
+        spans.append((start, end))
+        if end >= length:
+            break
+
+        # Start the next chunk a little before this one ends, but not in the middle of a word
+        next_start = end - overlap
+        space = text.find(' ', next_start, end)
+        start = next_start if space == -1 else space + 1
+
+    chunks = []
+    for index, (start, end) in enumerate(spans):
+        keep_start = 0 if index == 0 else (start + spans[index - 1][1]) // 2
+        keep_end = length if index == len(spans) - 1 else (spans[index + 1][0] + end) // 2
+        chunks.append((start, end, keep_start, keep_end))
+    return chunks
+
+
+def merge_entities(entities):
+    # entities holds (label, text, start_char, end_char) with document offsets from all
+    # chunks. spaCy never returns overlapping entities within one Doc, so overlaps can only
+    # come from a chunk seam; keep the longest of them
+    merged = []
+    last_end = -1
+    for entity in sorted(entities, key=lambda entity: (entity[2], entity[2] - entity[3])):
+        if entity[2] >= last_end:
+            merged.append(entity)
+            last_end = entity[3]
+    return merged
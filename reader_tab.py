@@ -1,13 +1,211 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton
-from PyQt5.QtGui import QTextCharFormat, QColor, QTextCursor, QFont
-import spacy
+import bisect
+import itertools
+from collections import OrderedDict
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton, QCheckBox
+from PyQt5.QtGui import QTextCharFormat, QColor, QFont, QSyntaxHighlighter
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+from ner_store import labels_for, LABEL_COLORS, DEFAULT_COLOR
+from nlp_model import ner_disabled_components, chunk_spans, merge_entities
+from job_scheduler import Job, PRIORITY_INTERACTIVE
+
+
+def qt_offsets(text):
+    # Qt counts characters outside the Basic Multilingual Plane (emoji, some CJK) as two,
+    # Python as one. Returns a function mapping Python offsets in text to Qt positions
+    if all(ord(c) <= 0xFFFF for c in text):
+        return lambda offset: offset
+    shifts = [0] + list(itertools.accumulate(1 if ord(c) > 0xFFFF else 0 for c in text))
+    return lambda offset: offset + shifts[offset]
+
+
+# Edits are analyzed once typing has paused for this many milliseconds
+ANALYSIS_DELAY = 500
+
+# Paragraphs whose entities are kept in memory, least recently used are dropped first
+PARAGRAPH_CACHE_SIZE = 50000
+
+
+def document_paragraphs(document):
+    # Yields the paragraphs of a QTextDocument as lists of blocks. A paragraph runs up to
+    # the next blank line, so text with hard line breaks is analyzed as a whole like before
+    blocks = []
+    block = document.begin()
+    while block.isValid():
+        if block.text().strip():
+            blocks.append(block)
+        elif blocks:
+            yield blocks
+            blocks = []
+        block = block.next()
+    if blocks:
+        yield blocks
+
+
+def paragraph_text(blocks):
+    # The lines of a paragraph joined with spaces, which is the text that gets analyzed
+    return ' '.join(block.text() for block in blocks)
+
+
+def paragraph_segments(paragraph):
+    # Yields (segment, start, keep_start, keep_end). The cache is keyed by the segment text
+    # itself, a dict lookup hashes it much faster than a digest would. Very long paragraphs
+    # are analyzed in overlapping chunks like documents in the NER tab
+    for start, end, keep_start, keep_end in chunk_spans(paragraph):
+        yield paragraph[start:end], start, keep_start, keep_end
+
+
+def paragraph_entities(paragraph, cache):
+    # Returns [(label, text, start_char, end_char)] for one paragraph from the cache
+    # (an OrderedDict kept in least recently used order), or None while part of it
+    # hasn't been analyzed
+    found = cache.get(paragraph)
+    if found is not None:
+        # The common case: a paragraph analyzed in one piece
+        cache.move_to_end(paragraph)
+        return found
+
+    segments = list(paragraph_segments(paragraph))
+    if len(segments) == 1:
+        return None
+
+    entities = []
+    for segment, start, keep_start, keep_end in segments:
+        found = cache.get(segment)
+        if found is None:
+            return None
+        cache.move_to_end(segment)
+        entities.extend((label, text, start + ent_start, start + ent_end)
+                        for label, text, ent_start, ent_end in found if keep_start <= start + ent_start < keep_end)
+    return merge_entities(entities)
+
+
+class ParagraphAnalysisThread(Job):
+    # {paragraph: [(label, text, start_char, end_char)]} for every batch of analyzed paragraphs
+    paragraphs_analyzed = pyqtSignal(dict)
+
+    def __init__(self, model_service, segments, batch_size=32):
+        super(ParagraphAnalysisThread, self).__init__()
+        self.model_service = model_service
+        self.segments = segments  # Paragraph texts
+        self.batch_size = batch_size
+
+    def run(self):
+        if self.is_cancelled():
+            return
+
+        try:
+            nlp = self.model_service.load()
+        except Exception as e:
+            print(f"Error loading spaCy model: {e}")
+            return
+
+        results = {}
+        try:
+            for doc, segment in nlp.pipe(self.pending_segments(), as_tuples=True, batch_size=self.batch_size,
+                                     disable=ner_disabled_components(nlp)):
+                results[segment] = [(ent.label_, ent.text, ent.start_char, ent.end_char) for ent in doc.ents]
+                if len(results) >= self.batch_size:
+                    self.paragraphs_analyzed.emit(results)
+                    results = {}
+        except Exception as e:
+            print(f"Error analyzing text: {e}")
+
+        if results:
+            self.paragraphs_analyzed.emit(results)
+
+    def pending_segments(self):
+        for segment in self.segments:
+            if self.is_cancelled():
+                return
+            yield segment, segment
+
+
+class EntityHighlighter(QSyntaxHighlighter):
+    # Highlights each line from the cached analysis of its paragraph when Qt lays it out,
+    # so an edit only re-highlights the lines that changed
+    def __init__(self, document, cache):
+        super().__init__(None)
+        self.cache = cache
+        self.labels = set()
+        self.formats = {}
+
+        # (first block number, last block number, line offsets, entities) of the paragraph
+        # highlighted last, so its lines don't each join and look up the whole paragraph
+        # again. Connected before setDocument() so it is cleared before Qt re-highlights an edit
+        self.paragraph = None
+        document.contentsChange.connect(self.text_edited)
+        self.setDocument(document)
+
+    def text_edited(self, position, chars_removed, chars_added):
+        # Highlighting itself reports a change of no characters
+        if chars_removed or chars_added:
+            self.forget_paragraph()
+
+    def forget_paragraph(self):
+        self.paragraph = None
+
+    def set_labels(self, labels):
+        self.labels = set(labels)
+        self.rehighlight()
+
+    def label_format(self, label):
+        if label not in self.formats:
+            self.formats[label] = QTextCharFormat()
+            self.formats[label].setBackground(QColor(LABEL_COLORS.get(label, DEFAULT_COLOR)))
+        return self.formats[label]
+
+    def current_paragraph(self):
+        block = self.currentBlock()
+        number = block.blockNumber()
+        if self.paragraph is None or not self.paragraph[0] <= number <= self.paragraph[1]:
+            first = block
+            while first.previous().isValid() and first.previous().text().strip():
+                first = first.previous()
+            blocks = []
+            while first.isValid() and first.text().strip():
+                blocks.append(first)
+                first = first.next()
+            offsets = [0] + list(itertools.accumulate(len(line.text()) + 1 for line in blocks))
+            entities = paragraph_entities(paragraph_text(blocks), self.cache) or []
+            self.paragraph = (blocks[0].blockNumber(), blocks[-1].blockNumber(), offsets, entities)
+        return self.paragraph[2][number - self.paragraph[0]], self.paragraph[3]
+
+    def highlightBlock(self, text):
+        if not self.labels or not text.strip():
+            return
+
+        offset, entities = self.current_paragraph()
+        if not entities:
+            return
+
+        # Entities are found in the joined paragraph; each line gets the part inside it.
+        # They are in order and don't overlap, so the first one ending in this line is
+        # found by bisecting their ends
+        position = qt_offsets(text)
+        end_of_line = offset + len(text)
+        for index in range(bisect.bisect_right(entities, offset, key=lambda entity: entity[3]), len(entities)):
+            label, entity_text, start, end = entities[index]
+            if start >= end_of_line:
+                break
+            if label in self.labels:
+                start, end = max(start, offset) - offset, min(end, end_of_line) - offset
+                self.setFormat(position(start), position(end) - position(start), self.label_format(label))
+
 
 class ReaderTab(QWidget):
-    def __init__(self):
+    def __init__(self, model_service, job_scheduler):
         super().__init__()
 
-        # Load the English NLP model from spaCy
-        self.nlp = spacy.load('en_core_web_lg')
+        # Shared spaCy model, loaded in the background by the main window
+        self.model_service = model_service
+        self.job_scheduler = job_scheduler
+
+        # Paragraph text -> [(label, text, start_char, end_char)], filled by ParagraphAnalysisThread
+        self.paragraph_cache = OrderedDict()
+        self.current_label = None
+        self.analysis_thread = None
+        self.pending_blocks = []  # Lines to highlight again once the analysis is done
 
         # Create the layout for the Reader tab
         layout = QVBoxLayout()
@@ -28,6 +226,25 @@ class ReaderTab(QWidget):
             ner_button_layout.addWidget(button)
             self.ner_buttons.append(button)
 
+        # The buttons stay disabled until the model has finished loading
+        self.set_buttons_enabled(self.model_service.is_ready())
+        self.model_service.model_ready.connect(lambda: self.set_buttons_enabled(True))
+        self.model_service.model_failed.connect(
+            lambda error: self.extracted_entities_editor.setPlainText(f'Could not load the language model: {error}'))
+
+        # Analyze edited paragraphs in the background while typing, so label switches are instant
+        self.live_analysis_checkbox = QCheckBox('Live Analysis')
+        self.live_analysis_checkbox.toggled.connect(self.text_changed)
+        ner_button_layout.addWidget(self.live_analysis_checkbox)
+
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.setSingleShot(True)
+        self.analysis_timer.setInterval(ANALYSIS_DELAY)
+        self.analysis_timer.timeout.connect(self.analyze_text)
+        self.text_viewer.textChanged.connect(self.text_changed)
+
+        self.highlighter = EntityHighlighter(self.text_viewer.document(), self.paragraph_cache)
+
         text_viewer_layout.addLayout(ner_button_layout)
         layout.addLayout(text_viewer_layout)
 
@@ -51,51 +268,77 @@ class ReaderTab(QWidget):
         # Set the layout for the Reader tab
         self.setLayout(layout)
 
+    def set_buttons_enabled(self, enabled):
+        for button in self.ner_buttons:
+            button.setEnabled(enabled)
+            button.setToolTip('' if enabled else 'Loading language model...')
+
+    def text_changed(self):
+        # Restarts the delay on every keystroke, the analysis runs once typing pauses
+        if self.live_analysis_checkbox.isChecked():
+            self.analysis_timer.start()
+
     def extract_entities(self, label):
-        # Get the text from the text viewer
-        text = self.text_viewer.toPlainText()
+        # Highlights what is already cached right away; paragraphs that are new or
+        # edited since the last analysis follow once they have been analyzed
+        self.current_label = label
+        self.highlighter.set_labels(labels_for(label))
+        self.analyze_text()
 
-        # Replace line breaks with spaces
-        text = text.replace('\n', ' ')
+    def analyze_text(self):
+        # Collect the paragraphs the cache doesn't have yet
+        segments = {}
+        self.pending_blocks = []
+        for blocks in document_paragraphs(self.text_viewer.document()):
+            paragraph = paragraph_text(blocks)
+            if paragraph not in self.paragraph_cache:
+                missing = False
+                for segment, start, keep_start, keep_end in paragraph_segments(paragraph):
+                    if segment not in self.paragraph_cache:
+                        segments[segment] = None
+                        missing = True
+                if missing:
+                    self.pending_blocks.extend(blocks)
 
-        # Process the text with spaCy NLP model
-        doc = self.nlp(text)
+        # Results of an analysis that is replaced still go into the cache
+        self.job_scheduler.cancel(self.analysis_thread)
+        self.analysis_thread = None
 
-        # Extract entities based on the specified label
-        if label == 'SUBJECT':
-            entities = set(ent.text for ent in doc.ents if ent.label_ in ['PERSON', 'ORG'])
-        elif label == 'PLACE':
-            entities = set(ent.text for ent in doc.ents if ent.label_ in ['GPE', 'LOC'])
-        else:
-            entities = set(ent.text for ent in doc.ents if ent.label_ == label)
+        if not segments:
+            self.show_entities()
+            return
 
-        # Display the extracted entities in the bottom editor
-        self.extracted_entities_editor.setPlainText(', '.join(entities))
+        self.analysis_thread = ParagraphAnalysisThread(self.model_service, list(segments))
+        self.analysis_thread.paragraphs_analyzed.connect(self.store_paragraphs)
+        self.analysis_thread.finished.connect(self.analysis_finished)
+        self.job_scheduler.submit(self.analysis_thread, None, PRIORITY_INTERACTIVE)
 
-        # Highlight the extracted entities in the text viewer
-        self.highlight_entities(entities)
-
-    def highlight_entities(self, entities):
-        cursor = self.text_viewer.textCursor()
-
-        # Clear any previous formatting
-        cursor.select(QTextCursor.Document)
-        cursor.setCharFormat(QTextCharFormat())
-
-        # Highlight the extracted entities
-        for entity in entities:
-            pos = 0
-            while pos != -1:
-                # Find the start and end positions of the entity
-                start_pos = self.text_viewer.toPlainText().find(entity, pos)
-                end_pos = start_pos + len(entity)
-
-                if start_pos != -1:
-                    cursor.setPosition(start_pos)
-                    cursor.setPosition(end_pos, QTextCursor.KeepAnchor)
-                    char_format = QTextCharFormat()
-                    char_format.setBackground(QColor("yellow"))  # Highlight background color
-                    cursor.setCharFormat(char_format)
-                    pos = end_pos
-                else:
-                    pos = -1
+    def store_paragraphs(self, results):
+        self.paragraph_cache.update(results)
+        self.highlighter.forget_paragraph()
+        while len(self.paragraph_cache) > PARAGRAPH_CACHE_SIZE:
+            self.paragraph_cache.popitem(last=False)
+
+    def analysis_finished(self):
+        if self.sender() is not self.analysis_thread:
+            return
+
+        for block in self.pending_blocks:
+            if block.isValid():
+                self.highlighter.rehighlightBlock(block)
+        self.pending_blocks = []
+        self.show_entities()
+
+    def show_entities(self):
+        if self.current_label is None:
+            return
+
+        # Display the extracted entities in the bottom editor, in order of appearance
+        labels = labels_for(self.current_label)
+        entities = {}
+        for blocks in document_paragraphs(self.text_viewer.document()):
+            for label, entity_text, start, end in paragraph_entities(paragraph_text(blocks), self.paragraph_cache) or []:
+                if label in labels:
+                    entities[entity_text] = None
+
+        self.extracted_entities_editor.setPlainText(', '.join(entities))
@@ -0,0 +1,166 @@
+import re
+from collections import deque
+
+# Literal terms (the default) or one real regular expression
+SEARCH_MODE_TERMS = 'terms'
+SEARCH_MODE_REGEX = 'regex'
+
+# From this many literal terms on, the Aho-Corasick matcher is used instead of one big
+# regex alternation, which gets slower with every term it holds. The pure Python matcher
+# only catches up with the regex engine at around 100 terms
+AHO_CORASICK_MIN_TERMS = 100
+
+
+def parse_search_terms(query):
+    # Pasted or loaded watchlists have one term per line so names like "John Smith"
+    # stay together; a single line is split into whitespace separated terms
+    query = query.strip()
+    if '\n' in query:
+        terms = [line.strip() for line in query.splitlines()]
+    else:
+        terms = re.split(r'\s+', query)
+
+    # Drop empty and repeated terms, keep the original order
+    return list(dict.fromkeys(term for term in terms if term))
+
+
+def load_terms_file(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+
+def fold_case(text):
+    # Lower-cases text without changing its length, so offsets stay valid
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def is_word_char(c):
+    return c.isalnum() or c == '_'
+
+
+class RegexMatcher:
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def find_all(self, text):
+        # Returns [(start, end, term)] with the matched text lower-cased as the term
+        return [(match.start(), match.end(), match.group().lower()) for match in self.pattern.finditer(text)
+                if match.end() > match.start()]
+
+
+class AhoCorasickMatcher:
+    def __init__(self, terms, whole_words=True):
+        self.terms = list(terms)
+        self.whole_words = whole_words
+
+        # Trie over the case-folded terms: goto transitions, failure links and the
+        # indexes of the terms that end in each state (including via failure links)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for term_index, term in enumerate(self.terms):
+            state = 0
+            for c in fold_case(term):
+                next_state = self.goto[state].get(c)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][c] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(term_index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and c not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(c, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find_all(self, text):
+        # One linear pass over text regardless of the number of terms. Returns
+        # [(start, end, term)] for non-overlapping matches, leftmost and longest first,
+        # just like the regex alternation the literal terms mode used before
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        lengths = [len(term) for term in self.terms]
+
+        candidates = []
+        state = 0
+        for i, c in enumerate(fold_case(text)):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for term_index in output[state]:
+                start = i + 1 - lengths[term_index]
+                if self.whole_words and ((start > 0 and is_word_char(text[start - 1])) or
+                                         (i + 1 < len(text) and is_word_char(text[i + 1]))):
+                    continue
+                candidates.append((start, i + 1, term_index))
+
+        matches = []
+        last_end = 0
+        for start, end, term_index in sorted(candidates, key=lambda match: (match[0], -match[1])):
+            if start >= last_end:
+                matches.append((start, end, self.terms[term_index].lower()))
+                last_end = end
+        return matches
+
+
+def compile_search_pattern(query, mode=SEARCH_MODE_TERMS):
+    # Built once per search; raises re.error for an invalid regular expression
+    if mode == SEARCH_MODE_REGEX:
+        return RegexMatcher(re.compile(query, re.IGNORECASE | re.MULTILINE))
+
+    search_terms = parse_search_terms(query)
+    if len(search_terms) >= AHO_CORASICK_MIN_TERMS:
+        return AhoCorasickMatcher(search_terms)
+
+    # Longest first so a term is never cut short by another term that is its prefix.
+    # Lookarounds instead of \b so terms that start or end with punctuation still match
+    search_terms = sorted(search_terms, key=len, reverse=True)
+    return RegexMatcher(re.compile(r'(?<!\w)(?:' + '|'.join(map(re.escape, search_terms)) + r')(?!\w)',
+                                   re.IGNORECASE))
+
+
+def search_text(matcher, text, snippet_size, context_size):
+    # Scans text once and returns one result per snippet: a snippet starts context_size
+    # characters before a match, and matches already inside the previous snippet don't
+    # get a (nearly identical) snippet of their own. Each result has the distinct terms in it
+    matches = matcher.find_all(text)
+
+    results = []
+    first = 0
+    last = 0
+    previous_end = -1
+    for start, end, term in matches:
+        if end <= previous_end:
+            continue
+
+        snippet_start = max(0, start - context_size)
+        snippet_end = max(snippet_start + snippet_size, end)
+
+        # Matches are ordered and never overlap, so the window over them only moves forward
+        while matches[first][0] < snippet_start:
+            first += 1
+        while last < len(matches) and matches[last][1] <= snippet_end:
+            last += 1
+
+        previous_end = snippet_end
+        results.append({
+            'position': start,
+            'snippet': text[snippet_start:snippet_end],
+            'terms': set(match[2] for match in matches[first:last]),
+        })
+
+    return results
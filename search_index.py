@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import threading
+
+from document_extraction import iter_document_pages
+
+# The index is stored in the selected directory so reopening it doesn't rebuild anything
+INDEX_FILE_NAME = '.document_index.json'
+INDEX_VERSION = 1
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Words added since the vocabulary string was built are tested one by one; past this
+# many it is built again
+VOCABULARY_REBUILD_WORDS = 10000
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def document_contains_all(document_path, search_terms):
+    # Fallback for documents the index can't answer for: read page by page and
+    # stop as soon as the last missing term has been found
+    missing_terms = set(term.lower() for term in search_terms)
+    for page_number, page_offset, page_text in iter_document_pages(document_path):
+        page_text = page_text.lower()
+        missing_terms = set(term for term in missing_terms if term not in page_text)
+        if not missing_terms:
+            return True
+    return False
+
+
+class SearchIndex:
+    def __init__(self, directory_path):
+        self.directory_path = directory_path
+        self.index_path = os.path.join(directory_path, INDEX_FILE_NAME)
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.loaded = False
+
+        self.documents = {}  # relative path -> [document id, size, mtime]
+        self.postings = {}   # word -> set of document ids
+        self.next_id = 0
+        self.modified = False
+
+        # Every word joined by newlines for substring lookups, built on the first search
+        self.vocabulary = None
+        self.new_words = []
+
+    def relative_path(self, document_path):
+        return os.path.relpath(document_path, self.directory_path)
+
+    def absolute_path(self, relative_path):
+        return os.path.join(self.directory_path, relative_path)
+
+    def ensure_loaded(self):
+        # Loads the saved index once, whichever job asks first; the other waits for it
+        with self.load_lock:
+            if not self.loaded:
+                self.load()
+                self.loaded = True
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get('version') != INDEX_VERSION:
+            return False
+
+        with self.lock:
+            self.documents = data['documents']
+            self.postings = {word: set(ids) for word, ids in data['postings'].items()}
+            self.next_id = data['next_id']
+            self.modified = False
+            self.vocabulary = None
+            self.new_words = []
+        return True
+
+    def save(self):
+        with self.lock:
+            if not self.modified:
+                return
+            data = {
+                'version': INDEX_VERSION,
+                'documents': self.documents,
+                'postings': {word: list(ids) for word, ids in self.postings.items()},
+                'next_id': self.next_id,
+            }
+            self.modified = False
+
+        # Write to a temporary file first so a crash never leaves a truncated index behind
+        temp_path = self.index_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Error saving search index {self.index_path}: {e}")
+
+    def is_current(self, document_path):
+        entry = self.documents.get(self.relative_path(document_path))
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(document_path)
+        except OSError:
+            return False
+        return entry[1] == stat.st_size and entry[2] == stat.st_mtime_ns
+
+    def add_document(self, document_path):
+        stat = os.stat(document_path)
+
+        words = set()
+        for page_number, page_offset, page_text in iter_document_pages(document_path):
+            words.update(tokenize(page_text))
+
+        with self.lock:
+            self.remove_locked([document_path])
+
+            document_id = self.next_id
+            self.next_id += 1
+            self.documents[self.relative_path(document_path)] = [document_id, stat.st_size, stat.st_mtime_ns]
+            for word in words:
+                word_ids = self.postings.get(word)
+                if word_ids is None:
+                    word_ids = self.postings[word] = set()
+                    if self.vocabulary is not None:
+                        self.new_words.append(word)
+                word_ids.add(document_id)
+            self.modified = True
+
+    def remove_document(self, document_path):
+        self.remove_documents([document_path])
+
+    def remove_documents(self, document_paths):
+        # One pass over the posting lists however many documents are removed
+        with self.lock:
+            self.remove_locked(document_paths)
+
+    def remove_locked(self, document_paths):
+        document_ids = set()
+        for document_path in document_paths:
+            entry = self.documents.pop(self.relative_path(document_path), None)
+            if entry is not None:
+                document_ids.add(entry[0])
+        if not document_ids:
+            return
+
+        empty_words = []
+        for word, ids in self.postings.items():
+            ids -= document_ids
+            if not ids:
+                empty_words.append(word)
+        for word in empty_words:
+            del self.postings[word]
+        self.modified = True
+
+    def update(self, document_list, progress=None, interrupted=None):
+        # Bring the index in line with document_list: drop deleted documents and
+        # (re)index only the ones that are new or changed since they were indexed
+        current = set(self.relative_path(document_path) for document_path in document_list)
+        removed = [self.absolute_path(path) for path in self.documents if path not in current]
+        self.apply_changes(document_list, removed, progress, interrupted)
+
+    def apply_changes(self, changed_documents, removed_documents, progress=None, interrupted=None):
+        # Used directly for the files a corpus watcher reports, without looking at the rest
+        if removed_documents:
+            self.remove_documents(removed_documents)
+
+        total = len(changed_documents)
+        for done, document_path in enumerate(changed_documents, start=1):
+            if interrupted and interrupted():
+                break
+
+            if not self.is_current(document_path):
+                try:
+                    self.add_document(document_path)
+                except Exception as e:
+                    print(f"Error indexing file {document_path}: {e}")
+
+            if progress:
+                progress(done, total)
+
+    def matching_ids(self, term, candidate_ids):
+        # Terms match anywhere inside a word, like the plain substring search did
+        ids = set()
+        for word in self.matching_words(term):
+            word_ids = self.postings.get(word)
+            if word_ids:
+                ids |= word_ids & candidate_ids
+        return ids
+
+    def matching_words(self, term):
+        # The words are searched as one string with str.find, which scans it in C instead
+        # of testing every word in Python. Terms are word characters only, so a match
+        # never spans the newline between two words. Removed words stay in the string
+        # until it is rebuilt and have no posting list. A single character is in so many
+        # words that testing each of them is quicker
+        if len(term) == 1:
+            return [word for word in self.postings if term in word]
+
+        if self.vocabulary is None or len(self.new_words) > VOCABULARY_REBUILD_WORDS:
+            self.vocabulary = '\n' + '\n'.join(self.postings) + '\n'
+            self.new_words = []
+
+        words = [word for word in self.new_words if term in word]
+        position = self.vocabulary.find(term)
+        while position != -1:
+            start = self.vocabulary.rfind('\n', 0, position) + 1
+            end = self.vocabulary.find('\n', position)
+            words.append(self.vocabulary[start:end])
+            position = self.vocabulary.find(term, end)
+        return words
+
+    def search(self, search_terms, document_list):
+        # Returns (documents containing all terms, documents not indexed yet).
+        # Terms made only of word characters are answered from the posting lists;
+        # other terms narrow the candidates by their words and are then verified
+        search_terms = [term.lower() for term in search_terms if term]
+        with self.lock:
+            indexed = {}
+            unindexed = []
+            for document_path in document_list:
+                entry = self.documents.get(self.relative_path(document_path))
+                if entry is None:
+                    unindexed.append(document_path)
+                else:
+                    indexed[entry[0]] = document_path
+
+            candidate_ids = set(indexed)
+            needs_verification = False
+            for term in sorted(search_terms, key=len, reverse=True):
+                words = tokenize(term)
+                if words != [term]:
+                    needs_verification = True
+                for word in words:
+                    if candidate_ids:
+                        candidate_ids = self.matching_ids(word, candidate_ids)
+
+        # Keep the order of document_list
+        matches = [document_path for document_id, document_path in indexed.items() if document_id in candidate_ids]
+        if needs_verification:
+            matches = [document_path for document_path in matches
+                       if document_contains_all(document_path, search_terms)]
+        return matches, unindexed
@@ -0,0 +1,146 @@
+import os
+import heapq
+import bisect
+import itertools
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Refreshes adding at most this many results insert them one row at a time; larger ones
+# merge them in with a single pass over the rows
+ROW_BY_ROW_INSERTS = 100
+
+# Largest result limit offered; a refresh still touches every row when it merges, which
+# takes about 0.1 s at this size
+MAX_RESULT_LIMIT = 200000
+
+
+class SearchResultsModel(QAbstractTableModel):
+    headers = ['Document Name', 'Page', 'Matched Snippet', 'Match Count']
+
+    def __init__(self, limit=5000, parent=None):
+        super().__init__(parent)
+        self.limit = limit
+
+        # Min-heap of (match_count, -arrival, document_path, page, snippet) holding only
+        # the best `limit` results; ties keep the result that was found first
+        self.heap = []
+        self.arrival = itertools.count()
+        self.total_results = 0
+
+        # The shown results as (-match_count, arrival, document_path, page, snippet), kept
+        # sorted so that display order is ascending order and rows are found with bisect
+        self.rows = []
+        self.pending = []  # Results kept since the last refresh
+        self.evicted = []  # Results pushed out of the heap since the last refresh
+
+    def clear(self, limit=None):
+        self.beginResetModel()
+        if limit is not None:
+            self.limit = limit
+        self.heap = []
+        self.arrival = itertools.count()
+        self.total_results = 0
+        self.rows = []
+        self.pending = []
+        self.evicted = []
+        self.endResetModel()
+
+    def add_result(self, document_path, page, snippet, match_count):
+        self.total_results += 1
+        record = (match_count, -next(self.arrival), document_path, page, snippet)
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, record)
+        elif record > self.heap[0]:
+            evicted = heapq.heapreplace(self.heap, record)
+            self.evicted.append((-evicted[0], -evicted[1]) + evicted[2:])
+        else:
+            return
+        self.pending.append((-record[0], -record[1]) + record[2:])
+
+    def refresh(self):
+        # Called periodically while results stream in. Most matching terms first, then in
+        # the order the results were found. The rows stay sorted between refreshes, so only
+        # the results added or evicted since the last one are moved and the view keeps its
+        # scroll position
+        if not self.pending and not self.evicted:
+            return
+
+        # A result can arrive and be evicted again between two refreshes
+        added, evicted = self.pending, self.evicted
+        if evicted:
+            evicted = set(evicted)
+            added = [record for record in added if record not in evicted]
+            evicted.difference_update(self.pending)
+        self.pending = []
+        self.evicted = []
+
+        # The heap always evicts its worst result, so the evicted rows are the last ones
+        if evicted:
+            self.beginRemoveRows(QModelIndex(), len(self.rows) - len(evicted), len(self.rows) - 1)
+            del self.rows[len(self.rows) - len(evicted):]
+            self.endRemoveRows()
+
+        if len(added) <= ROW_BY_ROW_INSERTS:
+            for record in added:
+                row = bisect.bisect_left(self.rows, record)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.rows.insert(row, record)
+                self.endInsertRows()
+        else:
+            self.merge_rows(added)
+
+    def merge_rows(self, added):
+        # Appends the results, then moves them into place as one layout change
+        added.sort()
+        rows = []
+        start = 0
+        for record in added:
+            # Copies the rows in between as slices, without comparing records
+            position = bisect.bisect_left(self.rows, record, start)
+            rows += self.rows[start:position]
+            rows.append(record)
+            start = position
+        rows += self.rows[start:]
+
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(rows) - 1)
+        self.rows = self.rows + added
+        self.endInsertRows()
+
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        records = [self.rows[index.row()] for index in persistent]
+        self.rows = rows
+        self.changePersistentIndexList(persistent, [self.index(bisect.bisect_left(self.rows, record), index.column())
+                                                    for record, index in zip(records, persistent)])
+        self.layoutChanged.emit()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Only called for the rows the view is currently showing
+        if not index.isValid():
+            return None
+
+        negative_count, _, document_path, page, snippet = self.rows[index.row()]
+        match_count = -negative_count
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return os.path.basename(document_path)
+            elif column == 1:
+                return str(page)
+            elif column == 2:
+                return snippet.replace('\n', ' ')
+            elif column == 3:
+                return str(match_count)
+        elif role == Qt.ToolTipRole and column == 0:
+            return document_path
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
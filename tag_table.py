@@ -0,0 +1,92 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Tags are stored in the second column as one string
+TAG_SEPARATOR = ', '
+
+# Edits that can be undone
+UNDO_LIMIT = 100
+
+
+def split_tags(value):
+    if not value:
+        return []
+    return [tag.strip() for tag in value.split(TAG_SEPARATOR)]
+
+
+def remove_tag(value, tag):
+    return TAG_SEPARATOR.join(existing for existing in split_tags(value) if existing != tag)
+
+
+class TagTable:
+    # A CSV of names (first column) and their tags (second column), read once and kept in
+    # memory. Rows are found through a dict on the first column; edits change the
+    # in-memory copy and save() writes the file only when something changed
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+
+        # Everything as text, so values are written back exactly as they were read
+        self.frame = pd.read_csv(csv_file, dtype=object, keep_default_na=False)
+        if self.frame.shape[1] < 2:
+            raise ValueError(f"{csv_file} needs a column of names and a column of tags")
+
+        self.keys = self.frame.iloc[:, 0].tolist()
+        self.values = self.frame.iloc[:, 1].tolist()
+        self.rows = {}  # first column value -> its first row, like the old equality scan
+        for row, key in enumerate(self.keys):
+            self.rows.setdefault(key, row)
+
+        self.undo_stack = []  # [{row: tag string before the edit}]
+        self.modified = False
+
+    def tags(self, key):
+        row = self.rows.get(key)
+        return [] if row is None else split_tags(self.values[row])
+
+    def remove_tag(self, key, tag):
+        row = self.rows.get(key)
+        if row is None:
+            return
+        self.change({row: remove_tag(self.values[row], tag)})
+
+    def remove_tag_everywhere(self, tag):
+        # Only rows whose text contains the tag can change, found in one pass
+        candidates = np.flatnonzero(pd.Series(self.values, dtype=object).str.contains(tag, regex=False).to_numpy())
+        self.change({row: remove_tag(self.values[row], tag) for row in candidates.tolist()})
+
+    def change(self, new_values):
+        # Applies {row: new tag string} as one undoable edit
+        old_values = {row: self.values[row] for row, value in new_values.items() if self.values[row] != value}
+        if not old_values:
+            return
+        for row in old_values:
+            self.values[row] = new_values[row]
+        self.undo_stack.append(old_values)
+        del self.undo_stack[:-UNDO_LIMIT]
+        self.modified = True
+
+    def undo(self):
+        # Returns the names whose tags changed back
+        if not self.undo_stack:
+            return set()
+        old_values = self.undo_stack.pop()
+        for row, value in old_values.items():
+            self.values[row] = value
+        self.modified = True
+        return set(self.keys[row] for row in old_values)
+
+    def save(self):
+        if not self.modified:
+            return
+        self.frame.isetitem(1, self.values)
+        self.modified = False
+
+        # Write to a temporary file first so a crash never leaves a truncated CSV behind
+        temp_path = self.csv_file + '.tmp'
+        try:
+            self.frame.to_csv(temp_path, index=False)
+            os.replace(temp_path, self.csv_file)
+        except OSError as e:
+            self.modified = True
+            print(f"Error saving CSV file {self.csv_file}: {e}")